@@ -61,6 +61,7 @@ import json
 import shutil
 import inspect
 import importlib
+import threading
 from pathlib import Path
 from typing import Any, Optional, Tuple, Union
 
@@ -98,6 +99,10 @@ JOV_GLSL = ROOT / 'res' / 'glsl'
 JOV_WEB_RES_ROOT = "https://raw.githubusercontent.com/Amorano/Jovimetrix-examples/master"
 
 JOV_LOG_LEVEL = os.getenv("JOV_LOG_LEVEL", "WARNING")
+
+# precompile res/glsl when the session loads: "1" blocks startup, "thread" runs in the background
+JOV_GLSL_WARMUP = os.getenv("JOV_GLSL_WARMUP", "").lower()
+
 logger.configure(handlers=[{"sink": sys.stdout, "level": JOV_LOG_LEVEL}])
 
 # =============================================================================
@@ -327,4 +332,11 @@ class Session(metaclass=Singleton):
             NODE_CLASS_MAPPINGS[k] = v
             # logger.debug('⁉️ {} {}', k, v)
 
+        if JOV_GLSL_WARMUP in ["1", "true", "thread"]:
+            from Jovimetrix.sup.shader import shader_warmup
+            if JOV_GLSL_WARMUP == "thread":
+                threading.Thread(target=shader_warmup, args=(JOV_GLSL,), daemon=True).start()
+            else:
+                shader_warmup(JOV_GLSL)
+
 session = Session()
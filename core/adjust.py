@@ -15,8 +15,8 @@ from Jovimetrix import JOV_WEB_RES_ROOT, JOVBaseNode, WILDCARD
 from Jovimetrix.sup.lexicon import Lexicon
 from Jovimetrix.sup.util import EnumConvertType, zip_longest_fill, parse_parameter
 from Jovimetrix.sup.image import channel_count, \
-    color_match_histogram, color_match_lut, color_match_reinhard, \
-    cv2tensor_full, image_color_blind, image_scalefit, tensor2cv, image_equalize, \
+    color_match_histogram, color_match_histogram_cdf, color_match_lut, color_match_reinhard, \
+    cv2tensor_full_batch, image_color_blind, image_scalefit, tensor2cv, image_equalize, \
     image_levels, pixel_eval, image_posterize, image_pixelate, image_quantize, \
     image_sharpen, image_threshold, image_blend, image_invert, morph_edge_detect, \
     morph_emboss, image_contrast, image_hsv, image_gamma, \
@@ -90,6 +90,7 @@ class AdjustNode(JOVBaseNode):
         params = [tuple(x) for x in zip_longest_fill(pA, mask, op, radius, amt, lohi,
                                                      lmh, hsv, contrast, gamma, matte, invert)]
         images = []
+        mattes = []
         pbar = ProgressBar(len(params))
         for idx, (pA, mask, op, radius, amt, lohi, lmh, hsv, contrast, gamma, matte, invert) in enumerate(params):
             # logger.debug(radius)
@@ -185,9 +186,10 @@ class AdjustNode(JOVBaseNode):
             if cc == 4:
                 pA[:,:,3] = alpha
             matte = pixel_eval(matte, EnumImageType.BGRA)
-            images.append(cv2tensor_full(pA, matte))
+            images.append(pA)
+            mattes.append(matte)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
 
 class ColorMatchNode(JOVBaseNode):
     NAME = "COLOR MATCH (JOV) 💞"
@@ -233,10 +235,14 @@ class ColorMatchNode(JOVBaseNode):
         params = [tuple(x) for x in zip_longest_fill(pA, pB, colormap, colormatch_mode,
                                                      colormatch_map, num_colors, flip, invert, matte)]
         images = []
+        mattes = []
+        # histogram references counted once per run, by input and output size
+        cdfs = {}
         pbar = ProgressBar(len(params))
         for idx, (pA, pB, colormap, mode, cmap, num_colors, flip, invert, matte) in enumerate(params):
             if flip == True:
                 pA, pB = pB, pA
+            ref = id(pB)
             pA = tensor2cv(pA)
             h, w = pA.shape[:2]
             pB = tensor2cv(pB, width=w, height=h)
@@ -251,15 +257,18 @@ class ColorMatchNode(JOVBaseNode):
                 case EnumColorMatchMode.HISTOGRAM:
                     pB = image_scalefit(pB, w, h, EnumScaleMode.CROP)
                     pB = image_scalefit(pB, w, h, EnumScaleMode.MATTE)
-                    pA = color_match_histogram(pA, pB)
+                    if (cdf := cdfs.get((ref, w, h))) is None:
+                        cdf = cdfs[(ref, w, h)] = color_match_histogram_cdf(pB)
+                    pA = color_match_histogram(pA, pB, cdf)
                 case EnumColorMatchMode.REINHARD:
                     pA = color_match_reinhard(pA, pB)
             if invert == True:
                 pA = image_invert(pA, 1)
             matte = pixel_eval(matte, EnumImageType.BGRA)
-            images.append(cv2tensor_full(pA, matte))
+            images.append(pA)
+            mattes.append(matte)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
 
 class ThresholdNode(JOVBaseNode):
     NAME = "THRESHOLD (JOV) 📉"
@@ -302,9 +311,9 @@ class ThresholdNode(JOVBaseNode):
             pA = image_threshold(pA, th, mode, adapt, block)
             if invert == True:
                 pA = image_invert(pA, 1)
-            images.append(cv2tensor_full(pA))
+            images.append(pA)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images))
 
 class ColorBlindNode(JOVBaseNode):
     NAME = "COLOR BLIND (JOV) 👁‍🗨"
@@ -342,6 +351,6 @@ class ColorBlindNode(JOVBaseNode):
             defiency = EnumCBDefiency[defiency]
             simulator = EnumCBSimulator[simulator]
             pA = image_color_blind(pA, defiency, simulator, severity)
-            images.append(cv2tensor_full(pA))
+            images.append(pA)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images))
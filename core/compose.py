@@ -18,10 +18,11 @@ from Jovimetrix.sup.lexicon import Lexicon
 from Jovimetrix.sup.util import parse_dynamic, parse_parameter, zip_longest_fill, \
     EnumConvertType
 from Jovimetrix.sup.image import  channel_merge, \
-    channel_solid, channel_swap, cv2tensor_full, \
+    channel_solid, channel_swap, cv2tensor_full, cv2tensor_full_batch, \
     image_crop, image_crop_center, image_crop_polygonal, image_grayscale, \
     image_mask, image_mask_add, image_matte, image_transform, \
-    image_split, pixel_eval, tensor2cv, \
+    image_transform_batch, image_transform_matrix, \
+    image_split, pixel_eval, tensor2cv, tensor2cv_batch, \
     image_edge_wrap, image_scalefit, cv2tensor, \
     image_stack, image_mirror, image_blend, \
     color_theory, remap_fisheye, remap_perspective, remap_polar, \
@@ -29,7 +30,7 @@ from Jovimetrix.sup.image import  channel_merge, \
     EnumImageType, EnumColorTheory, EnumProjection, \
     EnumScaleMode, EnumInterpolation, EnumBlendType, \
     EnumEdge, EnumMirrorMode, EnumOrientation, EnumPixelSwizzle, \
-    MIN_IMAGE_SIZE
+    ImageBuffer, MIN_IMAGE_SIZE
 
 # =============================================================================
 
@@ -94,16 +95,18 @@ class TransformNode(JOVBaseNode):
         sample = parse_parameter(Lexicon.SAMPLE, kw, EnumInterpolation.LANCZOS4.name, EnumConvertType.STRING)
         matte = parse_parameter(Lexicon.MATTE, kw, (0, 0, 0, 255), EnumConvertType.VEC4INT, 0, 255)
         params = [tuple(x) for x in zip_longest_fill(pA, offset, angle, size, edge, tile_xy, mirror, mirror_pivot, proj, strength, tltr, blbr, mode, wihi, sample, matte)]
+        if (batch := self.__run_batch(params)) is not None:
+            return batch
         images = []
+        mattes = []
         pbar = ProgressBar(len(params))
         for idx, (pA, offset, angle, size, edge, tile_xy, mirror, mirror_pivot, proj, strength, tltr, blbr, mode, wihi, sample, matte) in enumerate(params):
             matte = pixel_eval(matte, EnumImageType.BGRA)
             pA = tensor2cv(pA)
-            h, w = pA.shape[:2]
             edge = EnumEdge[edge]
             sample = EnumInterpolation[sample]
             pA = image_transform(pA, offset, angle, size, sample, edge)
-            pA = image_crop_center(pA, w, h)
+            h, w = pA.shape[:2]
 
             mirror = EnumMirrorMode[mirror]
             if mirror != EnumMirrorMode.NONE:
@@ -142,9 +145,47 @@ class TransformNode(JOVBaseNode):
                 w, h = wihi
                 pA = image_scalefit(pA, w, h, mode, sample)
 
-            images.append(cv2tensor_full(pA, matte))
+            images.append(pA)
+            mattes.append(matte)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
+
+    def __run_batch(self, params: list[tuple]) -> tuple[torch.Tensor, ...] | None:
+        """Whole batch path for plain affine transforms.
+
+        When every input is a same sized IMAGE tensor and only the XY, ANGLE and
+        SIZE inputs are in play, each frame gets one composed matrix and the
+        stack is warped in a single pass. Returns None when the per frame path
+        is needed.
+        """
+        frames = [p[0] for p in params]
+        if not all(isinstance(f, torch.Tensor) and f.ndim in [3, 4] and f.shape[-1] in [3, 4] for f in frames):
+            return None
+        if len(set(tuple(f.shape[-3:-1]) for f in frames)) > 1:
+            return None
+        if len(set((p[4], p[14]) for p in params)) > 1:
+            return None
+        # grid_sample has no Lanczos kernel; keep the exact per frame result
+        if params[0][14] == EnumInterpolation.LANCZOS4.name:
+            return None
+        for p in params:
+            if tuple(p[5]) != (1, 1) or p[6] != EnumMirrorMode.NONE.name or \
+                p[8] != EnumProjection.NORMAL.name or p[12] != EnumScaleMode.NONE.name:
+                return None
+
+        h, w = frames[0].shape[-3:-1]
+        stack = []
+        matrices = []
+        mattes = []
+        for pA, offset, angle, size, *_, matte in params:
+            pA = pA.reshape(-1, h, w, pA.shape[-1])
+            # opaque alpha so clipped regions come back transparent
+            stack.append(torch.nn.functional.pad(pA, (0, 4 - pA.shape[-1]), value=1))
+            matrices.extend([image_transform_matrix(w, h, offset, angle, size)] * len(pA))
+            mattes.extend([pixel_eval(matte, EnumImageType.BGRA)] * len(pA))
+        stack = image_transform_batch(torch.cat(stack), matrices,
+                                      EnumInterpolation[params[0][14]], EnumEdge[params[0][4]])
+        return list(cv2tensor_full_batch(tensor2cv_batch(stack), mattes))
 
 class BlendNode(JOVBaseNode):
     NAME = "BLEND (JOV) ⚗️"
@@ -189,6 +230,7 @@ class BlendNode(JOVBaseNode):
         invert = parse_parameter(Lexicon.INVERT, kw, False, EnumConvertType.BOOLEAN)
         params = [tuple(x) for x in zip_longest_fill(pA, pB, mask, func, alpha, flip, mode, wihi, sample, matte, invert)]
         images = []
+        mattes = []
         pbar = ProgressBar(len(params))
         for idx, (pA, pB, mask, func, alpha, flip, mode, wihi, sample, matte, invert) in enumerate(params):
 
@@ -201,15 +243,16 @@ class BlendNode(JOVBaseNode):
             elif pB is not None:
                 h, w = pB.size()[2:]
 
+            # stay in RGBA the whole way; no channel swaps until output
             matte = pixel_eval(matte, EnumImageType.BGRA)
-            pA = tensor2cv(pA, width=w, height=h)
+            pA = ImageBuffer.from_tensor(pA, w, h)
             pA = image_matte(pA, matte)
-            pB = tensor2cv(pB, width=w, height=h)
+            pB = ImageBuffer.from_tensor(pB, w, h)
 
             if mask is None:
-                mask = image_mask(pB)
+                mask = image_mask(pB.data)
             else:
-                h, w = pB.shape[:2]
+                h, w = pB.data.shape[:2]
                 mask = tensor2cv(mask, EnumImageType.GRAYSCALE, w, h)
 
             if invert:
@@ -221,11 +264,11 @@ class BlendNode(JOVBaseNode):
             if mode != EnumScaleMode.NONE:
                 w, h = wihi
                 sample = EnumInterpolation[sample]
-                img = image_scalefit(img, w, h, mode, sample)
-            img = cv2tensor_full(img, matte)
+                img.data = image_scalefit(img.data, w, h, mode, sample)
             images.append(img)
+            mattes.append(matte)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
 
 class PixelSplitNode(JOVBaseNode):
     NAME = "PIXEL SPLIT (JOV) 💔"
@@ -292,6 +335,7 @@ class PixelMergeNode(JOVBaseNode):
         matte = parse_parameter(Lexicon.MATTE, kw, (0, 0, 0), EnumConvertType.VEC3INT, 0, 255)
         params = [tuple(x) for x in zip_longest_fill(R, G, B, A, matte)]
         images = []
+        mattes = []
         pbar = ProgressBar(len(params))
         for idx, (r, g, b, a, matte) in enumerate(params):
             r = tensor2cv(r, EnumImageType.GRAYSCALE)
@@ -299,9 +343,10 @@ class PixelMergeNode(JOVBaseNode):
             b = tensor2cv(b, EnumImageType.GRAYSCALE)
             mask = tensor2cv(a, EnumImageType.GRAYSCALE)
             img = channel_merge([b, g, r, mask])
-            images.append(cv2tensor_full(img, matte))
+            images.append(img)
+            mattes.append(matte)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
 
 class PixelSwapNode(JOVBaseNode):
     NAME = "PIXEL SWAP (JOV) 🔃"
@@ -373,9 +418,9 @@ class PixelSwapNode(JOVBaseNode):
             out[:,:,1] = swapper(EnumPixelSwizzle.GREEN_A, swap_g)[:,:,1]
             out[:,:,2] = swapper(EnumPixelSwizzle.RED_A, swap_r)[:,:,2]
             out[:,:,3] = swapper(EnumPixelSwizzle.ALPHA_A, swap_a)[:,:,3]
-            images.append(cv2tensor_full(out))
+            images.append(out)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images))
 
 class StackNode(JOVBaseNode):
     NAME = "STACK (JOV) ➕"
@@ -461,6 +506,7 @@ class CropNode(JOVBaseNode):
         color = parse_parameter(Lexicon.RGB, kw, (0, 0, 0,), EnumConvertType.VEC3INT, 0, 255)
         params = [tuple(x) for x in zip_longest_fill(pA, func, xy, wihi, tltr, blbr, color)]
         images = []
+        mattes = []
         pbar = ProgressBar(len(params))
         for idx, (pA, func, xy, wihi, tltr, blbr, color) in enumerate(params):
             width, height = wihi
@@ -476,9 +522,10 @@ class CropNode(JOVBaseNode):
                 pA = image_crop(pA, width, height, xy)
             else:
                 pA = image_crop_center(pA, width, height)
-            images.append(cv2tensor_full(pA, color))
+            images.append(pA)
+            mattes.append(color)
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images, mattes))
 
 class ColorTheoryNode(JOVBaseNode):
     NAME = "COLOR THEORY (JOV) 🛞"
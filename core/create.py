@@ -15,11 +15,11 @@ from Jovimetrix.sup.lexicon import Lexicon
 from Jovimetrix.sup.util import parse_dynamic, parse_parameter, zip_longest_fill, \
     EnumConvertType
 
-from Jovimetrix.sup.image import  cv2tensor, cv2tensor_full, \
+from Jovimetrix.sup.image import  cv2tensor, cv2tensor_full, cv2tensor_full_batch, \
     image_gradient, image_grayscale, image_invert, image_mask_add, image_matte, \
-    image_rotate, image_stereogram, image_transform, image_translate, pil2cv, \
+    image_rotate, image_stereogram_batch, image_transform, image_translate, pil2cv, \
     pixel_eval, tensor2cv, shape_ellipse, shape_polygon, shape_quad, \
-    EnumEdge, EnumImageType, MIN_IMAGE_SIZE
+    EnumEdge, EnumGradient, EnumImageType, MIN_IMAGE_SIZE
 
 from Jovimetrix.sup.text import font_names, text_autosize, text_draw, \
     EnumAlignment, EnumJustify, EnumShapes
@@ -304,15 +304,14 @@ class StereogramNode(JOVBaseNode):
         shift = parse_parameter(Lexicon.SHIFT, kw, 1, EnumConvertType.FLOAT, -1, 1)
         params = [tuple(x) for x in zip_longest_fill(pA, depth, divisions, noise,
                                                      gamma, shift)]
-        images = []
         pbar = ProgressBar(len(params))
-        for idx, (pA, depth, divisions, noise, gamma, shift) in enumerate(params):
-            pA = tensor2cv(pA)
-            depth = tensor2cv(depth)
-            pA = image_stereogram(pA, depth, divisions, noise, gamma, shift)
-            images.append(cv2tensor_full(pA))
-            pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        pA, depth, divisions, noise, gamma, shift = (list(x) for x in zip(*params))
+        pA = [tensor2cv(x) for x in pA]
+        depth = [tensor2cv(x) for x in depth]
+        # all frames are solved together, in parallel across rows
+        images = image_stereogram_batch(pA, depth, divisions, noise, gamma, shift)
+        pbar.update_absolute(len(params))
+        return list(cv2tensor_full_batch(images))
 
 class GradientNode(JOVBaseNode):
     NAME = "GRADIENT (JOV) 🍧"
@@ -331,21 +330,23 @@ class GradientNode(JOVBaseNode):
             Lexicon.PIXEL: (WILDCARD, {"tooltip":"Optional Image to Matte with Selected Color"}),
             Lexicon.WH: ("VEC2", {"default": (512, 512), "step": 1,
                                   "label": [Lexicon.W, Lexicon.H],
-                                  "tooltip": "Desired Width and Height of the Color Output"})
+                                  "tooltip": "Desired Width and Height of the Color Output"}),
+            Lexicon.ORIENT: (EnumGradient._member_names_, {"default": EnumGradient.HORIZONTAL.name}),
         }}
         return Lexicon._parse(d, cls.HELP_URL)
 
     def run(self, **kw) -> tuple[torch.Tensor, torch.Tensor]:
         pA = parse_parameter(Lexicon.PIXEL, kw, None, EnumConvertType.IMAGE)
         wihi = parse_parameter(Lexicon.WH, kw, (MIN_IMAGE_SIZE, MIN_IMAGE_SIZE), EnumConvertType.VEC2INT, 1)
+        orient = parse_parameter(Lexicon.ORIENT, kw, EnumGradient.HORIZONTAL.name, EnumConvertType.STRING)
         colors = parse_dynamic(Lexicon.COLOR, kw)
         images = []
-        params = [tuple(x) for x in zip_longest_fill(pA, wihi, colors)]
+        params = [tuple(x) for x in zip_longest_fill(pA, wihi, orient, colors)]
         pbar = ProgressBar(len(params))
-        for idx, (pA, wihi, clr) in enumerate(params):
+        for idx, (pA, wihi, orient, clr) in enumerate(params):
             # colors = [(0,0,0,255) if c is None else pixel_eval(c, EnumImageType.BGRA) for c in clr]
             width, height = wihi
-            image = image_gradient(width, height, clr)
+            image = image_gradient(width, height, clr, EnumGradient[orient])
             if pA is not None:
                 pA = tensor2cv(pA)
                 pA = image_matte(image, imageB=pA)
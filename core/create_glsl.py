@@ -3,9 +3,11 @@ Jovimetrix - http://www.github.com/amorano/jovimetrix
 Creation - GLSL
 """
 
+import re
 from enum import Enum
 
 import torch
+import numpy as np
 from loguru import logger
 
 from comfy.utils import ProgressBar
@@ -15,19 +17,18 @@ from Jovimetrix import JOV_WEB_RES_ROOT, comfy_message, parse_reset, JOVBaseNode
 from Jovimetrix.sup.lexicon import Lexicon
 from Jovimetrix.sup.util import parse_parameter, zip_longest_fill, \
     EnumConvertType
-from Jovimetrix.sup.image import  cv2tensor_full, \
-    pil2cv, tensor2pil, MIN_IMAGE_SIZE
-from Jovimetrix.sup.shader import GLSL, CompileException
+from Jovimetrix.sup.image import  cv2tensor_full_batch, \
+    EnumImageType, ImageBuffer, MIN_IMAGE_SIZE
+from Jovimetrix.sup.shader import GLSL, GLSLChain, CompileException, channel_data, \
+    DEFAULT_FRAGMENT, MAX_WIDTH, MAX_HEIGHT
 
 # =============================================================================
 
 JOV_CATEGORY = "GLSL"
 JOV_CONFIG_GLSL = ROOT / 'glsl'
-DEFAULT_FRAGMENT = """void main() {
-    vec4 texColor = texture(iChannel0, fragCoord);
-    vec4 color = vec4(fragCoord, abs(sin(iTime)), 1.0);
-    fragColor = vec4((texColor.xyz + color.xyz) / 2.0, 1.0);
-}"""
+DEFAULT_CHAIN = """vfx/vfx-bulge.glsl
+// pass
+vfx/vfx-chromatic.glsl"""
 
 # =============================================================================
 
@@ -102,7 +103,9 @@ class GLSLNode(JOVBaseNode):
         super().__init__(*arg, **kw)
         self.__glsl = None
         self.__fragment = ""
-        self.__last_good = [torch.zeros((MIN_IMAGE_SIZE, MIN_IMAGE_SIZE, 4), dtype=torch.uint8, device="cpu")]
+        self.__last_good = [torch.zeros((1, MIN_IMAGE_SIZE, MIN_IMAGE_SIZE, 4)),
+                            torch.zeros((1, MIN_IMAGE_SIZE, MIN_IMAGE_SIZE, 3)),
+                            torch.zeros((1, MIN_IMAGE_SIZE, MIN_IMAGE_SIZE))]
 
     def run(self, ident, **kw) -> list[torch.Tensor]:
         frame_count = parse_parameter(Lexicon.FRAME_COUNT, kw, 1, EnumConvertType.INT, 1)
@@ -118,20 +121,31 @@ class GLSLNode(JOVBaseNode):
         images = []
         pbar = ProgressBar(len(params))
         for idx, (frame_count, frame_rate, fragment, param, width, height, pA, hold, reset) in enumerate(params):
+            # past what one framebuffer can hold, render each frame in tiles
+            tiled = width > MAX_WIDTH or height > MAX_HEIGHT
             if self.__fragment != fragment or self.__glsl is None:
+                # programs are cached by source, so switching back never recompiles
+                if self.__glsl is not None:
+                    self.__glsl.release()
+                    self.__glsl = None
                 try:
-                    self.__glsl = GLSL(fragment, width, height, param)
+                    # tiled renders never touch the instance framebuffer; keep it small
+                    size = (MIN_IMAGE_SIZE, MIN_IMAGE_SIZE) if tiled else (width, height)
+                    self.__glsl = GLSL.create(fragment, *size, param)
                 except CompileException as e:
                     comfy_message(ident, "jovi-glsl-error", {"id": ident, "e": str(e)})
                     logger.error(e)
-                    return (self.__last_good, )
+                    return self.__last_good
                 self.__fragment = fragment
-
-            if width != self.__glsl.width:
-                self.__glsl.width = width
-            if height != self.__glsl.height:
-                self.__glsl.height = height
-            pA = tensor2pil(pA) if pA is not None else None
+                comfy_message(ident, "jovi-glsl-uniforms", {"id": ident, "uniforms": self.__glsl.uniforms})
+
+            if not tiled:
+                if width != self.__glsl.width:
+                    self.__glsl.width = width
+                if height != self.__glsl.height:
+                    self.__glsl.height = height
+            # convert once, not per rendered frame
+            pA = channel_data(pA) if pA is not None else None
             self.__glsl.hold = hold
             self.__glsl.total_frames = frame_count
             if parse_reset(ident) > 0 or reset:
@@ -139,17 +153,112 @@ class GLSLNode(JOVBaseNode):
                 # comfy_message(ident, "jovi-glsl-time", {"id": ident, "t": 0})
 
             self.__glsl.fps = frame_rate
-            for _ in range(frame_count):
-                img = self.__glsl.render(pA, param)
-                images.append(cv2tensor_full(pil2cv(img)))
+            if tiled:
+                batch = [self.__glsl.render_tiled(width, height, pA, param) for _ in range(frame_count)]
+            else:
+                batch = self.__glsl.render_batch(frame_count, pA, param)
+            images.extend(ImageBuffer(img, EnumImageType.RGBA) for img in batch)
             runtime = self.__glsl.runtime if not reset else 0
             comfy_message(ident, "jovi-glsl-time", {"id": ident, "t": runtime})
-
-            self.__last_good = images
             pbar.update_absolute(idx)
         # let's reset automatically the time
         self.__glsl.reset()
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        self.__last_good = list(cv2tensor_full_batch(images))
+        return self.__last_good
+
+class GLSLChainNode(JOVBaseNode):
+    NAME = "GLSL CHAIN (JOV) 🍩"
+    NAME_URL = NAME.split(" (JOV)")[0].replace(" ", "%20")
+    CATEGORY = f"JOVIMETRIX 🔺🟩🔵/{JOV_CATEGORY}"
+    DESCRIPTION = f"{JOV_WEB_RES_ROOT}/node/{NAME_URL}/{NAME_URL}.md"
+    HELP_URL = f"{JOV_CATEGORY}#-{NAME_URL}"
+    RETURN_TYPES = ("IMAGE", "IMAGE", "MASK")
+    RETURN_NAMES = (Lexicon.IMAGE, Lexicon.RGB, Lexicon.MASK)
+    SORT = 2
+
+    @classmethod
+    def INPUT_TYPES(cls) -> dict:
+        d = {
+        "required": {},
+        "optional": {
+            Lexicon.PIXEL: (WILDCARD, {}),
+            Lexicon.FRAME_COUNT: ("INT", {"default": 1, "min": 0}),
+            Lexicon.FRAME_RATE: ("FLOAT", {"default": 30, "min": 0, "step": 1, "precision": 6}),
+            Lexicon.WIDTH: ("INT", {"default": MIN_IMAGE_SIZE, "min": MIN_IMAGE_SIZE}),
+            Lexicon.HEIGHT: ("INT", {"default": MIN_IMAGE_SIZE, "min": MIN_IMAGE_SIZE}),
+            Lexicon.RESET: ("BOOLEAN", {"default": False}),
+            Lexicon.WAIT: ("BOOLEAN", {"default": False}),
+            Lexicon.FRAGMENT: ("STRING", {"multiline": True, "default": DEFAULT_CHAIN, "dynamicPrompts": False}),
+            Lexicon.PARAM: ("STRING", {"default": {}}),
+        },
+        "hidden": {
+            "ident": "UNIQUE_ID"
+        }}
+        return Lexicon._parse(d, cls.HELP_URL)
+
+    @classmethod
+    def IS_CHANGED(cls, **kw) -> float:
+        return float("nan")
+
+    def __init__(self, *arg, **kw) -> None:
+        super().__init__(*arg, **kw)
+        self.__chain = None
+        self.__fragment = ""
+
+    @staticmethod
+    def __passes(fragment: str) -> list[str]:
+        """Split on '// pass' lines; a pass naming a file under res/glsl loads it."""
+        passes = []
+        for frag in re.split(r"^\s*//\s*pass\s*$", fragment, flags=re.MULTILINE):
+            if len(frag := frag.strip()) == 0:
+                continue
+            if "\n" not in frag and (path := JOV_GLSL / frag).is_file():
+                frag = str(path)
+            passes.append(frag)
+        return passes
+
+    def run(self, ident, **kw) -> list[torch.Tensor]:
+        frame_count = parse_parameter(Lexicon.FRAME_COUNT, kw, 1, EnumConvertType.INT, 1)
+        frame_rate = parse_parameter(Lexicon.FRAME_RATE, kw, 30, EnumConvertType.FLOAT, 1)
+        fragment = parse_parameter(Lexicon.FRAGMENT, kw, DEFAULT_CHAIN, EnumConvertType.STRING)
+        param = parse_parameter(Lexicon.PARAM, kw, {}, EnumConvertType.DICT)
+        width = parse_parameter(Lexicon.WIDTH, kw, MIN_IMAGE_SIZE, EnumConvertType.INT, 1)
+        height = parse_parameter(Lexicon.HEIGHT, kw, MIN_IMAGE_SIZE, EnumConvertType.INT, 1)
+        pA = parse_parameter(Lexicon.PIXEL, kw, None, EnumConvertType.IMAGE)
+        hold = parse_parameter(Lexicon.WAIT, kw, False, EnumConvertType.BOOLEAN)
+        reset = parse_parameter(Lexicon.RESET, kw, False, EnumConvertType.BOOLEAN)
+        params = [tuple(x) for x in zip_longest_fill(frame_count, frame_rate, fragment, param, width, height, pA, hold, reset)]
+        images = []
+        pbar = ProgressBar(len(params))
+        for idx, (frame_count, frame_rate, fragment, param, width, height, pA, hold, reset) in enumerate(params):
+            if self.__fragment != fragment or self.__chain is None:
+                if self.__chain is not None:
+                    self.__chain.release()
+                    self.__chain = None
+                try:
+                    self.__chain = GLSLChain(self.__passes(fragment), width, height)
+                except CompileException as e:
+                    comfy_message(ident, "jovi-glsl-error", {"id": ident, "e": str(e)})
+                    logger.error(e)
+                    return [torch.zeros((1, height, width, 4)),
+                            torch.zeros((1, height, width, 3)),
+                            torch.zeros((1, height, width))]
+                self.__fragment = fragment
+
+            self.__chain.width = width
+            self.__chain.height = height
+            pA = channel_data(pA) if pA is not None else None
+            self.__chain.hold = hold
+            self.__chain.total_frames = frame_count
+            if parse_reset(ident) > 0 or reset:
+                self.__chain.reset()
+            self.__chain.fps = frame_rate
+            batch = self.__chain.render_batch(frame_count, pA, param)
+            images.extend(ImageBuffer(img, EnumImageType.RGBA) for img in batch)
+            comfy_message(ident, "jovi-glsl-time", {"id": ident, "t": self.__chain.runtime})
+            pbar.update_absolute(idx)
+        self.__chain.reset()
+        return list(cv2tensor_full_batch(images))
 
 class GLSLBaseNode(JOVBaseNode):
     NAME = ""
@@ -184,18 +293,26 @@ class GLSLBaseNode(JOVBaseNode):
 
         images = []
         params = [tuple(x) for x in zip_longest_fill(pA, pB, wihi, frag)]
+        # single values are sent once per run; the program skips unchanged ones
+        static = {k: v[0] for k, v in kw.items() if len(v) == 1}
+        varying = {k: v for k, v in kw.items() if len(v) > 1}
         pbar = ProgressBar(len(params))
         for idx, (pA, pB, wihi, frag) in enumerate(params):
-            param = {k: v[idx] for k, v in kw.items()}
+            param = {k: v[min(idx, len(v) - 1)] for k, v in varying.items()}
+            if idx == 0:
+                param.update(static)
             width, height = wihi
             if pA is not None:
-                pA = tensor2pil(pA)
-                width, height = pA.size
+                pA = channel_data(pA)
+                height, width = pA.shape[:2]
+            if pB is not None:
+                pB = channel_data(pB)
             if self.__glsl is None or self.__program is None or self.__program != frag:
                 if self.__glsl is not None:
+                    self.__glsl.release()
                     self.__glsl = None
                 try:
-                    self.__glsl = GLSL(frag, width, height, param)
+                    self.__glsl = GLSL.create(frag, width, height, static | param)
                 except CompileException as e:
                     logger.error(e)
                     logger.warning(param)
@@ -205,11 +322,11 @@ class GLSLBaseNode(JOVBaseNode):
                self.__glsl.width = width
                self.__glsl.height = height
 
-            image = self.__glsl.render(pA, param)
-            image = pil2cv(image)
-            images.append(cv2tensor_full(image))
+            image = np.empty((self.__glsl.height, self.__glsl.width, 4), dtype=np.uint8)
+            image = self.__glsl.render_array(pA, param, pB, out=image)
+            images.append(ImageBuffer(image, EnumImageType.RGBA))
             pbar.update_absolute(idx)
-        return [torch.stack(i, dim=0).squeeze(1) for i in list(zip(*images))]
+        return list(cv2tensor_full_batch(images))
 
 # =============================================================================
 
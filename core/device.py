@@ -10,7 +10,7 @@ Device -- MIDI, WEBCAM
 import sys
 import time
 import uuid
-from math import isclose
+from math import isclose, ceil
 from queue import Queue
 from enum import Enum
 
@@ -26,7 +26,8 @@ from Jovimetrix.sup.util import EnumConvertType, parse_parameter, parse_value, \
     zip_longest_fill
 from Jovimetrix.sup.stream import camera_list, monitor_list, window_list, \
     monitor_capture, window_capture, JOV_SPOUT, \
-    StreamingServer, StreamManager, MediaStreamDevice
+    StreamingServer, StreamManager, MediaStreamDevice, StreamEncoder, \
+    EnumStreamCodec
 
 if JOV_SPOUT:
     from Jovimetrix.sup.stream import SpoutSender, MediaStreamSpout
@@ -100,7 +101,7 @@ class StreamReaderNode(JOVBaseNode):
             Lexicon.WINDOW: (window, {"default": window_default}),
             Lexicon.DPI: ("BOOLEAN", {"default": True}),
             Lexicon.BBOX: ("VEC4", {"default": (0, 0, 1, 1), "step": 0.01, "precision": 4, "round": 0.00001, "label": [Lexicon.TOP, Lexicon.LEFT, Lexicon.BOTTOM, Lexicon.RIGHT]}),
-            Lexicon.FPS: ("INT", {"min": 1, "max": 60, "default": 30}),
+            Lexicon.FPS: ("INT", {"min": 0, "max": 60, "default": 30, "tooltip": "0 reads as fast as the source delivers"}),
             Lexicon.WAIT: ("BOOLEAN", {"default": False}),
             Lexicon.BATCH: ("VEC2", {"default": (1, 30), "step": 1, "label": ["COUNT", "FPS"]}),
             Lexicon.ORIENT: (EnumCanvasOrientation._member_names_, {"default": EnumCanvasOrientation.NORMAL.name}),
@@ -128,6 +129,25 @@ class StreamReaderNode(JOVBaseNode):
         self.__empty = (a, e, m,)
         self.__last = [(a, e, m,)]
 
+    def __stream_frames(self, count: int, rate: float) -> list:
+        """count frames rate seconds apart from the device's history ring; a
+        single frame is just the newest one.
+
+        The batch ends now when the ring already reaches back far enough,
+        otherwise it starts at the oldest buffered frame and only the rest is
+        collected going forward, as live capture did. A BATCH fps above the
+        source rate repeats frames rather than inventing new ones.
+        """
+        if count < 2:
+            return [self.__device.frame]
+        device = self.__device
+        device.history = max(device.history, ceil((count - 1) * rate * device.fps) + 2)
+        now = time.perf_counter()
+        start = now - rate * (count - 1)
+        start = now if (oldest := device.oldest) is None else max(start, oldest)
+        stamps = [start + rate * i for i in range(count)]
+        return [img for _, img in device.frames_at(stamps)]
+
     def run(self, **kw) -> tuple[torch.Tensor, torch.Tensor]:
         wait = parse_parameter(Lexicon.WAIT, kw, False, EnumConvertType.BOOLEAN)[0]
         if wait:
@@ -214,15 +234,15 @@ class StreamReaderNode(JOVBaseNode):
 
                 fps = parse_parameter(Lexicon.FPS, kw, 30, EnumConvertType.INT)[0]
                 # if self.__device.fps != fps:
-                self.__device.fps = fps
+                self.__device.freerun = fps == 0
+                self.__device.fps = fps or 30
 
                 if type(self.__device) == MediaStreamDevice:
                     self.__device.zoom = parse_parameter(Lexicon.ZOOM, kw, 0, EnumConvertType.INT)[0]
 
                 orient = parse_parameter(Lexicon.ORIENT, kw, EnumCanvasOrientation.NORMAL.name, EnumConvertType.STRING)[0]
                 # orient = EnumCanvasOrientation[orient]
-                for idx in range(batch_size):
-                    img = self.__device.frame
+                for idx, img in enumerate(self.__stream_frames(batch_size, rate)):
                     if img is None:
                         images.append(self.__empty)
                     else:
@@ -234,8 +254,6 @@ class StreamReaderNode(JOVBaseNode):
                         img = image_scalefit(img, width, height, mode, sample, matte)
                         images.append(cv2tensor_full(img))
                     pbar.update_absolute(idx)
-                    if batch_size > 1:
-                        time.sleep(rate)
 
         elif source == EnumStreamType.SPOUT:
             url = parse_parameter(Lexicon.URL, kw, "", EnumConvertType.STRING)[0]
@@ -245,17 +263,15 @@ class StreamReaderNode(JOVBaseNode):
             if self.__device:
                 self.__device.url = url
                 fps = parse_parameter(Lexicon.FPS, kw, 30, EnumConvertType.INT)[0]
-                self.__device.fps = fps
-                for idx in range(batch_size):
-                    img = self.__device.frame
+                self.__device.freerun = fps == 0
+                self.__device.fps = fps or 30
+                for idx, img in enumerate(self.__stream_frames(batch_size, rate)):
                     if img is None:
                         images.append(self.__empty)
                     else:
                         img = image_scalefit(img, width, height, mode, sample, matte)
                         images.append(cv2tensor_full(img))
                     pbar.update_absolute(idx)
-                    if batch_size > 1:
-                        time.sleep(rate)
 
         if len(images) == 0:
             images.append(self.__empty)
@@ -281,7 +297,11 @@ class StreamWriterNode(JOVBaseNode):
             Lexicon.MODE: (EnumScaleMode._member_names_, {"default": EnumScaleMode.NONE.name}),
             Lexicon.WH: ("VEC2", {"default": (MIN_IMAGE_SIZE, MIN_IMAGE_SIZE), "step": 1, "label": [Lexicon.W, Lexicon.H]}),
             Lexicon.SAMPLE: (EnumInterpolation._member_names_, {"default": EnumInterpolation.LANCZOS4.name}),
-            Lexicon.MATTE: ("VEC4", {"default": (0, 0, 0, 0), "step": 1, "label": [Lexicon.R, Lexicon.G, Lexicon.B, Lexicon.A], "rgb": True})
+            Lexicon.MATTE: ("VEC4", {"default": (0, 0, 0, 0), "step": 1, "label": [Lexicon.R, Lexicon.G, Lexicon.B, Lexicon.A], "rgb": True}),
+            Lexicon.FORMAT: (EnumStreamCodec._member_names_, {"default": EnumStreamCodec.JPEG.name}),
+            Lexicon.QUALITY: ("INT", {"default": 80, "min": 1, "max": 100}),
+            Lexicon.PREVIEW: ("INT", {"default": 0, "min": 0, "step": 1}),
+            Lexicon.FPS: ("FLOAT", {"default": 0, "min": 0, "step": 1})
         }}
         return Lexicon._parse(d, cls.HELP_URL)
 
@@ -294,6 +314,7 @@ class StreamWriterNode(JOVBaseNode):
     def __init__(self, *arg, **kw) -> None:
         super().__init__(*arg, **kw)
         self.__route = ""
+        self.__endpoint = None
         self.__unique = uuid.uuid4()
         self.__device = StreamManager().capture(self.__unique, static=True)
 
@@ -304,16 +325,23 @@ class StreamWriterNode(JOVBaseNode):
         matte = parse_parameter(Lexicon.MATTE, kw, (0,0,0,0), EnumConvertType.VEC4INT, 0, 255)
         mode = parse_parameter(Lexicon.MODE, kw, EnumScaleMode.NONE.name, EnumConvertType.STRING)
         sample = parse_parameter(Lexicon.SAMPLE, kw, EnumInterpolation.LANCZOS4.name, EnumConvertType.STRING)
-        params = [tuple(x) for x in zip_longest_fill(route, images, wihi, matte, mode, sample)]
+        codec = parse_parameter(Lexicon.FORMAT, kw, EnumStreamCodec.JPEG.name, EnumConvertType.STRING)
+        quality = parse_parameter(Lexicon.QUALITY, kw, 80, EnumConvertType.INT, 1, 100)
+        preview = parse_parameter(Lexicon.PREVIEW, kw, 0, EnumConvertType.INT, 0)
+        fps = parse_parameter(Lexicon.FPS, kw, 0, EnumConvertType.FLOAT, 0)
+        params = [tuple(x) for x in zip_longest_fill(route, images, wihi, matte, mode, sample, codec, quality, preview, fps)]
         pbar = ProgressBar(len(params))
-        for idx, (route, images, wihi, matte, mode, sample) in enumerate(params):
+        for idx, (route, images, wihi, matte, mode, sample, codec, quality, preview, fps) in enumerate(params):
+            encoder = StreamEncoder(EnumStreamCodec[codec], quality, preview, fps)
             if route != self.__route:
                 try:
-                    StreamingServer().endpointAdd(route, self.__device)
+                    self.__endpoint = StreamingServer().endpointAdd(route, self.__device, encoder)
                 except Exception as e:
                     logger.error(e)
                 StreamWriterNode.OUT_MAP[route] = self.__device
                 self.__route = route
+            elif self.__endpoint is not None:
+                self.__endpoint.encoder = encoder
 
             if self.__device is not None:
                 w, h = wihi
@@ -14,14 +14,13 @@ from typing import Any, Optional, Tuple, Union
 import cv2
 import torch
 import numpy as np
-from numba import jit
+from numba import jit, prange
 from daltonlens import simulate
 from sklearn.cluster import MiniBatchKMeans
 from scipy import ndimage
-from skimage import exposure
 from skimage.metrics import structural_similarity as ssim
-from PIL import Image, ImageDraw, ImageOps, ImageChops
-from blendmodes.blend import blendLayers, BlendType
+from PIL import Image, ImageDraw, ImageOps
+from blendmodes.blend import BlendType
 
 from loguru import logger
 
@@ -35,6 +34,7 @@ MIN_IMAGE_SIZE = 512
 HALFPI = math.pi / 2
 TAU = math.pi * 2
 
+
 # =============================================================================
 # === TYPE SHORTCUTS ===
 # =============================================================================
@@ -158,6 +158,11 @@ class EnumEdge(Enum):
     WRAPX = 3
     WRAPY = 4
 
+class EnumGradient(Enum):
+    HORIZONTAL = 0
+    VERTICAL = 1
+    RADIAL = 2
+
 class EnumGrayscaleCrunch(Enum):
     LOW = 0
     HIGH = 1
@@ -182,6 +187,10 @@ class EnumInterpolation(Enum):
     # WARP_FILL_OUTLIERS = cv2.WARP_FILL_OUTLIERS
     # WARP_INVERSE_MAP = cv2.WARP_INVERSE_MAP
 
+# interpolations the warpAffine/remap samplers accept
+AFFINE_INTERPOLATION = [EnumInterpolation.NEAREST, EnumInterpolation.LINEAR,
+                        EnumInterpolation.CUBIC, EnumInterpolation.LANCZOS4]
+
 class EnumIntFloat(Enum):
     FLOAT = 0
     INT = 1
@@ -252,6 +261,49 @@ class EnumCBDefiency(Enum):
     PROTAN = simulate.Deficiency.PROTAN
     TRITAN = simulate.Deficiency.TRITAN
 
+# =============================================================================
+# === IMAGE BUFFER ===
+# =============================================================================
+
+class ImageBuffer:
+    """uint8 pixels tagged with their channel order.
+
+    Order agnostic helpers (image_blend, image_matte, image_mask_add) keep a
+    buffer in whatever order it arrived in, so the RGB<->BGR swap only has to
+    happen at the edges. Plain arrays are still treated as BGR(A).
+    """
+    def __init__(self, data: np.ndarray, order: EnumImageType=EnumImageType.BGRA) -> None:
+        self.data = data
+        self.order = order
+
+    @classmethod
+    def from_tensor(cls, tensor: torch.Tensor, width:int=MIN_IMAGE_SIZE,
+                    height:int=MIN_IMAGE_SIZE, matte:TYPE_PIXEL=(0, 0, 0, 255)) -> "ImageBuffer":
+        """Wrap a tensor frame as RGBA, skipping the BGR swap entirely."""
+        return cls(tensor2cv(tensor, EnumImageType.RGBA, width, height, matte), EnumImageType.RGBA)
+
+    @property
+    def rgb(self) -> bool:
+        return self.order in [EnumImageType.RGB, EnumImageType.RGBA]
+
+    def to(self, order: EnumImageType) -> np.ndarray:
+        """Materialize the pixels in the requested order, swapping only when needed."""
+        cc = channel_count(self.data)[0]
+        if cc < 3 or self.rgb == (order in [EnumImageType.RGB, EnumImageType.RGBA]):
+            return self.data
+        # the swap is symmetric, so RGB(A)2BGR(A) also covers BGR(A)2RGB(A)
+        return cv2.cvtColor(self.data, cv2.COLOR_RGBA2BGRA if cc == 4 else cv2.COLOR_RGB2BGR)
+
+def image_unwrap(image: TYPE_IMAGE|ImageBuffer) -> tuple[TYPE_IMAGE, Optional[EnumImageType]]:
+    """Split an image into its pixels and channel order (None for plain BGR(A) arrays)."""
+    if isinstance(image, ImageBuffer):
+        return image.data, image.order
+    return image, None
+
+def image_rewrap(image: TYPE_IMAGE, order: Optional[EnumImageType]) -> TYPE_IMAGE|ImageBuffer:
+    """Inverse of image_unwrap."""
+    return image if order is None else ImageBuffer(image, order)
+
 # =============================================================================
 # === COLOR SPACE CONVERSION ===
 # =============================================================================
@@ -336,6 +388,53 @@ def cv2tensor_full(image: TYPE_IMAGE, matte:TYPE_PIXEL=0) -> tuple[torch.Tensor,
     rgb = image_convert(image, 3)
     return cv2tensor(image), cv2tensor(rgb), cv2tensor(mask)
 
+def cv2tensor_full_batch(images: list[TYPE_IMAGE|ImageBuffer] | np.ndarray,
+                         matte:TYPE_PIXEL|list[TYPE_PIXEL]=0) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Batched `cv2tensor_full`.
+
+    Converts a list (or [B,H,W,C] array) of same sized CV2 matrices into the
+    IMAGE, RGB and MASK tensors in one vectorized pass. The matte can be a
+    single color or one color per frame. RGB and MASK are contiguous copies,
+    so in place edits downstream never reach IMAGE. ImageBuffer frames already
+    in RGB(A) order are copied without a swap; the order is read per frame.
+    """
+    rgb = None
+    if not isinstance(images, np.ndarray):
+        rgb = np.array([image_unwrap(i)[1] in [EnumImageType.RGB, EnumImageType.RGBA] for i in images], dtype=bool)
+        images = [i.to(EnumImageType.RGBA if r else EnumImageType.BGRA) if isinstance(i, ImageBuffer) else i
+                  for i, r in zip(images, rgb)]
+        images = np.stack([image_convert(i, 4) for i in images])
+    elif images.ndim != 4 or images.shape[3] != 4:
+        images = np.stack([image_convert(i, 4) for i in images])
+    count, height, width = images.shape[:3]
+    if not isinstance(matte, list):
+        matte = [matte] * count
+    matte = [channel_solid(1, 1, tuple(m) if isinstance(m, list) else m, EnumImageType.BGRA)[0, 0, 2::-1] for m in matte]
+    matte = np.array(matte, dtype=np.float32).reshape(-1, 1, 1, 3)
+
+    # BGR(A) -> RGB(A) by view, straight into the float buffer
+    out = np.empty((count, height, width, 4), dtype=np.float32)
+    if rgb is None or not rgb.any():
+        out[..., :3] = images[..., 2::-1]
+    elif rgb.all():
+        out[..., :3] = images[..., :3]
+    else:
+        out[rgb, ..., :3] = images[rgb, ..., :3]
+        out[~rgb, ..., :3] = images[~rgb, ..., 2::-1]
+    out[..., 3] = images[..., 3]
+    np.divide(out[..., 3:], 255, out=out[..., 3:])
+
+    # matte the color channels against the alpha
+    color = out[..., :3]
+    np.subtract(color, matte, out=color)
+    np.multiply(color, out[..., 3:], out=color)
+    np.add(color, matte, out=color)
+    np.rint(color, out=color)
+    np.divide(color, 255, out=color)
+
+    image = torch.from_numpy(out)
+    return image, image[..., :3].contiguous(), image[..., 3].contiguous()
+
 def hsv2bgr(hsl_color: TYPE_PIXEL) -> TYPE_PIXEL:
     return cv2.cvtColor(np.uint8([[hsl_color]]), cv2.COLOR_HSV2BGR)[0, 0]
 
@@ -382,6 +481,8 @@ def pil2tensor(image: Image.Image) -> torch.Tensor:
 def tensor2cv(tensor: torch.Tensor, chan:EnumImageType=EnumImageType.BGRA, width:int=MIN_IMAGE_SIZE, height:int=MIN_IMAGE_SIZE, matte:TYPE_PIXEL=(0, 0, 0, 255)) -> TYPE_IMAGE:
     if not isinstance(tensor, (torch.Tensor,)):
         return channel_solid(width, height, matte, chan=chan)
+    if chan == EnumImageType.BGRA and (tensor.ndim < 4 or tensor.shape[0] == 1):
+        return tensor2cv_batch(tensor)[0]
     image = np.clip(tensor.squeeze().cpu().numpy() * 255, 0, 255).astype(np.uint8)
     cc = 1 if len(image.shape) < 3 else image.shape[2]
     if chan == EnumImageType.BGRA:
@@ -395,6 +496,7 @@ def tensor2cv(tensor: torch.Tensor, chan:EnumImageType=EnumImageType.BGRA, width
             return cv2.cvtColor(image, cv2.COLOR_RGB2RGBA)
         elif cc == 1:
             return cv2.cvtColor(image, cv2.COLOR_GRAY2RGBA)
+        return image
     elif chan == EnumImageType.BGR:
         if cc == 4:
             return cv2.cvtColor(image, cv2.COLOR_RGBA2BGR)
@@ -406,6 +508,7 @@ def tensor2cv(tensor: torch.Tensor, chan:EnumImageType=EnumImageType.BGRA, width
             return cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
         elif cc == 1:
             return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+        return image
     elif chan == EnumImageType.GRAYSCALE:
         if cc == 4:
             image = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
@@ -413,6 +516,29 @@ def tensor2cv(tensor: torch.Tensor, chan:EnumImageType=EnumImageType.BGRA, width
             image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     return np.expand_dims(image, -1)
 
+def tensor2cv_batch(tensor: torch.Tensor) -> np.ndarray:
+    """Convert an IMAGE [B,H,W,C] or MASK [B,H,W] tensor into a contiguous
+    uint8 BGRA array [B,H,W,4] in one vectorized pass."""
+    if tensor.ndim == 2:
+        tensor = tensor.unsqueeze(0)
+    if tensor.ndim == 3:
+        if tensor.shape[-1] in [1, 3, 4]:
+            tensor = tensor.unsqueeze(0)
+        else:
+            tensor = tensor.unsqueeze(-1)
+    image = torch.clamp(tensor * 255, 0, 255).to(torch.uint8).cpu().numpy()
+    count, height, width, cc = image.shape
+    out = np.empty((count, height, width, 4), dtype=np.uint8)
+    if cc == 1:
+        out[..., :3] = image
+    else:
+        out[..., :3] = image[..., 2::-1]
+    if cc == 4:
+        out[..., 3] = image[..., 3]
+    else:
+        out[..., 3] = 255
+    return out
+
 def tensor2pil(tensor: torch.Tensor) -> Image.Image:
     """Convert a torch Tensor to a PIL Image."""
     tensor = np.clip(255 * tensor.cpu().numpy().squeeze(), 0, 255).astype(np.uint8)
@@ -554,8 +680,8 @@ def channel_solid(width:int, height:int, color:TYPE_PIXEL=(0, 0, 0, 0),
         color += (255,)
 
     if chan == EnumImageType.RGBA:
-        color = color[2::-1]
-    return np.full((height, width, 4), color, dtype=np.uint8)
+        color = tuple(color[2::-1]) + tuple(color[3:4])
+    return np.full((height, width, 4), color[:4], dtype=np.uint8)
 
 def channel_merge(channel:list[TYPE_IMAGE]) -> TYPE_IMAGE:
     ch = [c.shape[:2] if c is not None else (0, 0) for c in channel[:3]]
@@ -617,6 +743,142 @@ def shape_polygon(width: int, height: int, size: float=1., sides: int=3, fill:TY
     d.regular_polygon(xy, sides, fill=fill)
     return image
 
+# =============================================================================
+# === BLEND ===
+# =============================================================================
+
+def _blend_lum(rgb: np.ndarray) -> np.ndarray:
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+def _blend_set_lum(rgb: np.ndarray, lum: np.ndarray) -> np.ndarray:
+    """Shift the colors to a new luminosity, pulling out of gamut pixels back
+    toward their gray the way blendmodes' _setLum does."""
+    rgb = rgb + (lum - _blend_lum(rgb))[..., None]
+    lum = _blend_lum(rgb)[..., None]
+    cmin = rgb.min(axis=-1, keepdims=True)
+    cmax = rgb.max(axis=-1, keepdims=True)
+    rgb = np.where(cmin < 0, lum + (rgb - lum) * lum / (lum - cmin), rgb)
+    return np.where(cmax > 1, lum + (rgb - lum) * (1 - lum) / (cmax - lum), rgb)
+
+def _blend_sat(rgb: np.ndarray) -> np.ndarray:
+    return rgb.max(axis=-1) - rgb.min(axis=-1)
+
+def _blend_set_sat(rgb: np.ndarray, sat: np.ndarray) -> np.ndarray:
+    """Rescale each pixel's channels to a new saturation (max - min), as
+    blendmodes' _setSat: min goes to 0, max to sat, mid keeps its ratio."""
+    order = np.argsort(rgb, axis=-1)
+    lo, mid, hi = [np.take_along_axis(rgb, order[..., i:i+1], axis=-1) for i in range(3)]
+    span = hi - lo
+    sat = sat[..., None]
+    valid = span > 0
+    out = np.zeros_like(rgb)
+    np.put_along_axis(out, order[..., 1:2], np.where(valid, (mid - lo) * sat / np.where(valid, span, 1), 0), axis=-1)
+    np.put_along_axis(out, order[..., 2:3], np.where(valid, sat, 0), axis=-1)
+    return out
+
+def _blend_burn(b: np.ndarray, f: np.ndarray) -> np.ndarray:
+    return np.where(f != 0, np.maximum(1 - (1 - b) / np.where(f == 0, 1, f), 0), 0)
+
+def _blend_dodge(b: np.ndarray, f: np.ndarray) -> np.ndarray:
+    return np.where(f != 1, np.minimum(b / np.where(f == 1, 1, 1 - f), 1), 1)
+
+def _blend_overlay(b: np.ndarray, f: np.ndarray) -> np.ndarray:
+    return np.where(b < 0.5, 2 * b * f, 1 - 2 * (1 - b) * (1 - f))
+
+def _blend_reflect(b: np.ndarray, f: np.ndarray) -> np.ndarray:
+    return np.where(f != 1, np.minimum(b * b / np.where(f == 1, 1, 1 - f), 1), 1)
+
+# Color operators for each blend mode, over RGB floats in [0, 1]; (background, foreground)
+# ported from the blendmodes package functions. ADDITIVE and GLOW are missing
+# from its lookup and fall back to NORMAL there, so they do here as well.
+BLEND_OPS = {
+    BlendType.NORMAL: lambda b, f: f,
+    BlendType.ADDITIVE: lambda b, f: f,
+    BlendType.NEGATION: lambda b, f: np.maximum(b - f, 0),
+    BlendType.DIFFERENCE: lambda b, f: np.abs(b - f),
+    BlendType.MULTIPLY: lambda b, f: b * f,
+    BlendType.DIVIDE: lambda b, f: np.minimum((256. / 255. * b) / (1. / 255. + f), 1),
+    BlendType.LIGHTEN: lambda b, f: np.maximum(b, f),
+    BlendType.DARKEN: lambda b, f: np.minimum(b, f),
+    BlendType.SCREEN: lambda b, f: b + f - b * f,
+    BlendType.COLOURBURN: _blend_burn,
+    BlendType.COLOURDODGE: _blend_dodge,
+    BlendType.OVERLAY: _blend_overlay,
+    BlendType.SOFTLIGHT: lambda b, f: (1 - b) * b * f + b * (1 - (1 - b) * (1 - f)),
+    BlendType.HARDLIGHT: lambda b, f: _blend_overlay(f, b),
+    BlendType.PINLIGHT: lambda b, f: np.where(f < 0.5, np.minimum(b, 2 * f), np.maximum(b, 2 * f - 1)),
+    BlendType.VIVIDLIGHT: lambda b, f: np.where(f < 0.5, _blend_burn(b, 2 * f), _blend_dodge(b, 2 * f - 1)),
+    BlendType.EXCLUSION: lambda b, f: b + f - 2 * b * f,
+    BlendType.REFLECT: _blend_reflect,
+    BlendType.GLOW: lambda b, f: f,
+    BlendType.XOR: lambda b, f: np.bitwise_xor(np.rint(b * 255).astype(np.uint8),
+                                               np.rint(f * 255).astype(np.uint8)) / 255.,
+    BlendType.GRAINEXTRACT: lambda b, f: np.clip(b - f + 0.5, 0, 1),
+    BlendType.GRAINMERGE: lambda b, f: np.clip(b + f - 0.5, 0, 1),
+    BlendType.HUE: lambda b, f: _blend_set_lum(_blend_set_sat(f, _blend_sat(b)), _blend_lum(b)),
+    BlendType.SATURATION: lambda b, f: _blend_set_lum(_blend_set_sat(b, _blend_sat(f)), _blend_lum(b)),
+    BlendType.COLOUR: lambda b, f: _blend_set_lum(f, _blend_lum(b)),
+    BlendType.LUMINOSITY: lambda b, f: _blend_set_lum(b, _blend_lum(f)),
+}
+
+def blend_array(background: np.ndarray|torch.Tensor, foreground: np.ndarray|torch.Tensor,
+                blendOp:EnumBlendType|BlendType=BlendType.NORMAL, alpha:float=1,
+                mask:Optional[np.ndarray|torch.Tensor]=None, rgb:bool=False) -> np.ndarray|torch.Tensor:
+    """Composite foreground over background with a blend mode.
+
+    Works on 4 channel uint8 or float [0, 1] pixels of matching shape, with or
+    without a leading batch dimension; torch tensors (e.g. a whole [B,H,W,4]
+    batch) come back as tensors on their original device. The optional mask is
+    a single channel weight on the foreground alpha. Channels are assumed BGRA
+    unless rgb is set.
+    """
+    def to_float(img) -> tuple[np.ndarray, Any]:
+        if isinstance(img, torch.Tensor):
+            img = img.detach().cpu().numpy()
+        if img.dtype == np.uint8:
+            return img.astype(np.float32) / 255., np.uint8
+        return img.astype(np.float32, copy=False), img.dtype
+
+    device = background.device if isinstance(background, torch.Tensor) else None
+    bg, dtype = to_float(background)
+    fg = to_float(foreground)[0]
+    if isinstance(blendOp, EnumBlendType):
+        blendOp = blendOp.value
+
+    idx = slice(0, 3) if rgb else slice(2, None, -1)
+    bgC, fgC = bg[..., idx], fg[..., idx]
+    bgA = bg[..., 3:4]
+    fgA = fg[..., 3:4] * np.clip(alpha, 0, 1)
+    if mask is not None:
+        mask = to_float(mask)[0]
+        fgA = fgA * (mask if mask.ndim == fgA.ndim else mask[..., None])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if blendOp == BlendType.DESTIN:
+            outA, outC = bgA * fgA, bgC
+        elif blendOp == BlendType.DESTOUT:
+            outA, outC = bgA * (1 - fgA), bgC
+        elif blendOp == BlendType.SRCATOP:
+            outA, outC = bgA, fgA * fgC + (1 - fgA) * bgC
+        elif blendOp == BlendType.DESTATOP:
+            outA = fgA
+            outC = (fgA * (1 - bgA) * fgC + bgA * fgA * bgC) / fgA
+        else:
+            comb = bgA * fgA
+            outA = bgA + fgA - comb
+            outC = ((bgA - comb) * bgC + (fgA - comb) * fgC + comb * BLEND_OPS[blendOp](bgC, fgC)) / outA
+        outC = np.nan_to_num(outC, nan=0, posinf=0, neginf=0)
+
+    out = np.empty(bg.shape, dtype=np.float32)
+    out[..., idx] = outC
+    out[..., 3:4] = outA
+    np.clip(out, 0, 1, out=out)
+    if dtype == np.uint8:
+        out = np.rint(out * 255).astype(np.uint8)
+    if device is not None:
+        return torch.from_numpy(out).to(device)
+    return out
+
 # =============================================================================
 # === IMAGE ===
 # =============================================================================
@@ -629,12 +891,17 @@ def image_affine_edge(image: TYPE_IMAGE, callback: object, edge: EnumEdge=EnumEd
     image = image_crop_center(image, width, height)
     return image
 
-def image_blend(imageA: TYPE_IMAGE, imageB: TYPE_IMAGE, mask:Optional[TYPE_IMAGE]=None,
-                blendOp:BlendType=BlendType.NORMAL, alpha:float=1) -> TYPE_IMAGE:
+def image_blend(imageA: TYPE_IMAGE|ImageBuffer, imageB: TYPE_IMAGE|ImageBuffer, mask:Optional[TYPE_IMAGE]=None,
+                blendOp:EnumBlendType|BlendType=BlendType.NORMAL, alpha:float=1) -> TYPE_IMAGE|ImageBuffer:
+
+    imageA, order = image_unwrap(imageA)
+    rgb = order in [EnumImageType.RGB, EnumImageType.RGBA]
+    if not isinstance(imageB, ImageBuffer):
+        imageB = ImageBuffer(imageB)
+    imageB = imageB.to(order or EnumImageType.BGRA)
 
     h, w = imageA.shape[:2]
     imageA = image_convert(imageA, 4)
-    imageA = cv2pil(imageA)
     imageB = image_convert(imageB, 4)
     imageB = image_crop_center(imageB, w, h)
     imageB = image_matte(imageB, (0,0,0,0), w, h)
@@ -645,10 +912,8 @@ def image_blend(imageA: TYPE_IMAGE, imageB: TYPE_IMAGE, mask:Optional[TYPE_IMAGE
         mask = image_convert(mask, 1)
         old_mask = cv2.bitwise_and(mask, old_mask)
     imageB[:,:,3] = old_mask
-    imageB = cv2pil(imageB)
-    image = blendLayers(imageA, imageB, blendOp.value, np.clip(alpha, 0, 1))
-    image = pil2cv(image)
-    return image_crop_center(image, w, h)
+    image = blend_array(imageA, imageB, blendOp, alpha, rgb=rgb)
+    return image_rewrap(image, EnumImageType.RGBA if rgb else order)
 
 def image_color_blind(image: TYPE_IMAGE, deficiency:EnumCBDefiency,
                       simulator:EnumCBSimulator=EnumCBSimulator.AUTOSELECT,
@@ -702,7 +967,26 @@ def image_convert(image: TYPE_IMAGE, channels: int) -> TYPE_IMAGE:
         return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
     return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
 
+def image_crop_rect(image: TYPE_IMAGE, x:int, y:int, width:int, height:int) -> TYPE_IMAGE:
+    """Axis aligned crop by slicing, clipped to the image bounds; the end is
+    exclusive, so the result is at most width x height. Returns a view into the
+    source pixels, not a copy. Grayscale comes back [H,W,1] like the polygon path."""
+    h, w = image.shape[:2]
+    x1 = max(0, min(w, int(x)))
+    y1 = max(0, min(h, int(y)))
+    x2 = max(x1, min(w, int(x + width)))
+    y2 = max(y1, min(h, int(y + height)))
+    image = image[y1:y2, x1:x2]
+    return image[..., None] if image.ndim == 2 else image
+
 def image_crop_polygonal(image: TYPE_IMAGE, points: list[TYPE_COORD]) -> TYPE_IMAGE:
+    points = np.array(points, np.int32).reshape((-1, 2))
+    x1, y1 = points.min(axis=0).tolist()
+    x2, y2 = points.max(axis=0).tolist()
+    # axis aligned rectangles are just a slice
+    if len(points) == 4 and set(map(tuple, points.tolist())) == {(x1, y1), (x2, y1), (x2, y2), (x1, y2)}:
+        return image_crop_rect(image, x1, y1, x2 - x1 + 1, y2 - y1 + 1)
+
     cc, w, h = channel_count(image)[:3]
     mask = image_mask(image, 0)
     # crop area first
@@ -732,12 +1016,7 @@ def image_crop(image: TYPE_IMAGE, width:int=None, height:int=None, offset:tuple[
     width = width if width is not None else w
     height = height if height is not None else h
     x, y = offset
-    x = max(0, min(width, x))
-    y = max(0, min(width, y))
-    x2 = max(0, min(width, x + width))
-    y2 = max(0, min(height, y + height))
-    points = [(x, y), (x2, y), (x2, y2), (x, y2)]
-    return image_crop_polygonal(image, points)
+    return image_crop_rect(image, x, y, width, height)
 
 def image_crop_center(image: TYPE_IMAGE, width:int=None, height:int=None) -> TYPE_IMAGE:
     """Helper crop function to find the "center" of the area of interest."""
@@ -746,8 +1025,7 @@ def image_crop_center(image: TYPE_IMAGE, width:int=None, height:int=None) -> TYP
     height = height if height is not None else h
     y = max(0, int((h - height) / 2))
     x = max(0, int((w - width)/ 2))
-    points = [(x, y), (x + width - 1, y), (x + width - 1, y + height - 1), (x, y + height - 1)]
-    return image_crop_polygonal(image, points)
+    return image_crop_rect(image, x, y, width, height)
 
 def image_diff(imageA: TYPE_IMAGE, imageB: TYPE_IMAGE, threshold:int=0, color:TYPE_PIXEL=(255, 0, 0)) -> tuple[TYPE_IMAGE, TYPE_IMAGE, TYPE_IMAGE, TYPE_IMAGE, float]:
     _, w1, h1 = channel_count(imageA)[:3]
@@ -848,32 +1126,39 @@ def image_gamma(image: TYPE_IMAGE, value: float) -> TYPE_IMAGE:
         # now back to the original "format"
     return bgr2image(image, alpha, cc == 1)
 
-def image_gradient(width:int, height:int, color_map:dict=None) -> TYPE_IMAGE:
+def image_gradient(width:int, height:int, color_map:dict=None,
+                   orientation:EnumGradient=EnumGradient.HORIZONTAL) -> TYPE_IMAGE:
+    """Gaussian blended color stops (0..1 -> RGB(A)) along the chosen orientation."""
     if color_map is None:
         color_map = {0: (0,0,0,255)}
     else:
         color_map = {np.clip(float(k), 0, 1): [np.clip(int(c), 0, 255) for c in v] for k, v in color_map.items()}
     color_map = dict(sorted(color_map.items()))
-    image = Image.new('RGBA', (width, height))
-    draw = image.load()
-    widthf = float(width)
-
-    @jit
-    def gaussian(x, a, b, c, d=0) -> Any:
-        return a * math.exp(-(x - b)**2 / (2 * c**2)) + d
-
-    def pixel(x, spread:int=1) -> tuple[int, int, int]:
-        ws = widthf / (spread * len(color_map))
-        r = sum([gaussian(x, p[0], k * widthf, ws) for k, p in color_map.items()])
-        g = sum([gaussian(x, p[1], k * widthf, ws) for k, p in color_map.items()])
-        b = sum([gaussian(x, p[2], k * widthf, ws) for k, p in color_map.items()])
-        return min(255, int(r)), min(255, int(g)), min(255, int(b))
-
-    for x in range(width):
-        r, g, b = pixel(x)
-        for y in range(height):
-            draw[x, y] = r, g, b
-    return pil2cv(image)
+    stops = np.array(list(color_map.keys()), dtype=np.float64)
+    colors = np.array([c[:3] for c in color_map.values()], dtype=np.float64)
+
+    # distance along the gradient for every pixel, shaped to broadcast over [H,W]
+    match orientation:
+        case EnumGradient.VERTICAL:
+            span = float(height)
+            pos = np.arange(height, dtype=np.float64)[:, None]
+        case EnumGradient.RADIAL:
+            cx, cy = (width - 1) * 0.5, (height - 1) * 0.5
+            span = max(1., math.hypot(cx, cy))
+            y, x = np.ogrid[:height, :width]
+            pos = np.hypot(x - cx, y - cy)
+        case _:
+            span = float(width)
+            pos = np.arange(width, dtype=np.float64)[None, :]
+
+    spread = span / len(color_map)
+    weight = np.exp(-(pos[..., None] - stops * span)**2 / (2 * spread**2))
+    rgb = np.minimum(255, (weight @ colors).astype(np.int64))
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[..., :3] = rgb[..., ::-1]
+    image[..., 3] = 255
+    return image
 
 def image_grayscale(image: TYPE_IMAGE) -> TYPE_IMAGE:
     if image.dtype in [np.float16, np.float32, np.float64]:
@@ -903,34 +1188,61 @@ def image_grid(data: list[TYPE_IMAGE], width: int, height: int) -> TYPE_IMAGE:
 
     return frame
 
-def image_histogram(image:TYPE_IMAGE, bins=256) -> TYPE_IMAGE:
-    bins = max(image.max(), bins) + 1
-    flatImage = image.flatten()
-    histogram = np.zeros(bins)
-    for pixel in flatImage:
-        histogram[pixel] += 1
-    return histogram
-
-def image_histogram_normalize(image:TYPE_IMAGE)-> TYPE_IMAGE:
-    L = image.max()
-    nonEqualizedHistogram = image_histogram(image, bins=L)
-    sumPixels = np.sum(nonEqualizedHistogram)
-    nonEqualizedHistogram = nonEqualizedHistogram/sumPixels
-    cfdHistogram = np.cumsum(nonEqualizedHistogram)
+def image_histogram(image:TYPE_IMAGE, bins=256, mask:Optional[TYPE_IMAGE]=None,
+                    per_channel:bool=False) -> np.ndarray:
+    """Pixel counts per value, optionally per channel ([C, bins]) and only where mask > 0."""
+    bins = max(int(image.max()), bins) + 1
+    if per_channel:
+        image = image.reshape(image.shape[0], image.shape[1], -1)
+    if mask is not None:
+        image = image[mask.reshape(image.shape[:2]) > 0]
+    if not per_channel:
+        return np.bincount(image.ravel(), minlength=bins).astype(np.float64)
+    image = image.reshape(-1, image.shape[-1])
+    return np.stack([np.bincount(image[:, c], minlength=bins) for c in range(image.shape[1])]).astype(np.float64)
+
+def image_histogram_cdf(image:TYPE_IMAGE, mask:Optional[TYPE_IMAGE]=None) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Per channel (values, quantiles) of the occupied bins of a uint8 image.
+
+    Callers matching a batch against one static reference compute this once
+    and hand it to image_histogram_match.
+    """
+    cdf = []
+    for hist in image_histogram(image, 255, mask, per_channel=True):
+        values = np.nonzero(hist)[0]
+        counts = np.cumsum(hist[values])
+        cdf.append((values, counts / (counts[-1] if len(counts) else 1)))
+    return cdf
+
+def image_histogram_match(image:TYPE_IMAGE, reference:Optional[TYPE_IMAGE],
+                          mask:Optional[TYPE_IMAGE]=None,
+                          cdf:Optional[list[tuple[np.ndarray, np.ndarray]]]=None) -> TYPE_IMAGE:
+    """Per channel histogram matching of uint8 images through one LUT per channel.
+
+    cdf is the reference's image_histogram_cdf, when already known.
+    """
+    source = image_histogram(image, 255, mask, per_channel=True)
+    target = cdf if cdf is not None else image_histogram_cdf(reference)
+    image = image.reshape(image.shape[0], image.shape[1], -1)
+    out = np.empty_like(image)
+    for c, (hist, (values, quantiles)) in enumerate(zip(source, target)):
+        lut = np.interp(np.cumsum(hist) / max(1, hist.sum()), quantiles, values)
+        out[..., c] = cv2.LUT(image[..., c], np.rint(lut[:256]).astype(np.uint8))
+    return out
+
+def image_histogram_normalize(image:TYPE_IMAGE, mask:Optional[TYPE_IMAGE]=None)-> TYPE_IMAGE:
+    """Histogram equalization through a lookup table."""
+    L = int(image.max())
+    nonEqualizedHistogram = image_histogram(image, L, mask)
+    cfdHistogram = np.cumsum(nonEqualizedHistogram / np.sum(nonEqualizedHistogram))
     transformMap = np.floor((L-1) * cfdHistogram)
-    flatNonEqualizedImage = list(image.flatten())
-    flatEqualizedImage = [transformMap[p] for p in flatNonEqualizedImage]
-    return np.reshape(flatEqualizedImage, image.shape)
+    return transformMap[image]
 
 def image_histogram_statistics(histogram:np.ndarray, L=256)-> TYPE_IMAGE:
-    sumPixels = np.sum(histogram)
-    normalizedHistogram = histogram/sumPixels
-    mean = 0
-    for i in range(L):
-        mean += i * normalizedHistogram[i]
-    variance = 0
-    for i in range(L):
-        variance += (i-mean)**2 * normalizedHistogram[i]
+    normalizedHistogram = histogram[..., :L] / np.sum(histogram[..., :L], axis=-1, keepdims=True)
+    levels = np.arange(normalizedHistogram.shape[-1])
+    mean = np.sum(levels * normalizedHistogram, axis=-1)
+    variance = np.sum((levels - mean[..., None])**2 * normalizedHistogram, axis=-1)
     std = np.sqrt(variance)
     return mean, variance, std
 
@@ -1056,11 +1368,14 @@ def image_mask(image:TYPE_IMAGE, color:TYPE_PIXEL=255) -> TYPE_IMAGE:
         return np.expand_dims(image[:,:,3], -1)
     return channel_solid(width, height, color, EnumImageType.GRAYSCALE)
 
-def image_mask_add(image:TYPE_IMAGE, mask:TYPE_IMAGE=None) -> TYPE_IMAGE:
+def image_mask_add(image:TYPE_IMAGE|ImageBuffer, mask:TYPE_IMAGE=None) -> TYPE_IMAGE|ImageBuffer:
     """Places a default or custom mask into an image.
     Images are expanded to 4 channels.
     Existing 4 channel images with no mask input just return themselves.
     """
+    image, order = image_unwrap(image)
+    if order is not None:
+        return image_rewrap(image_mask_add(image, mask), order)
     h, w = image.shape[:2]
     image = image_convert(image, 4)
     if mask is None:
@@ -1071,9 +1386,12 @@ def image_mask_add(image:TYPE_IMAGE, mask:TYPE_IMAGE=None) -> TYPE_IMAGE:
     image[:,:,3] = mask[:,:,0]
     return image
 
-def image_matte(image:TYPE_IMAGE, color:TYPE_PIXEL=(0,0,0,255),
-                width:int=None, height:int=None, imageB:TYPE_IMAGE=None) -> TYPE_IMAGE:
-    """Puts an image atop a colored matte."""
+def image_matte(image:TYPE_IMAGE|ImageBuffer, color:TYPE_PIXEL=(0,0,0,255),
+                width:int=None, height:int=None, imageB:TYPE_IMAGE=None) -> TYPE_IMAGE|ImageBuffer:
+    """Puts an image atop a colored matte.
+    The color is BGR(A); it is swapped to match RGB(A) buffers."""
+    image, order = image_unwrap(image)
+    chan = EnumImageType.RGBA if order in [EnumImageType.RGB, EnumImageType.RGBA] else EnumImageType.BGRA
     cc, w, h = channel_count(image)[:3]
     width = width if width is not None else w
     height = height if height is not None else h
@@ -1091,7 +1409,7 @@ def image_matte(image:TYPE_IMAGE, color:TYPE_PIXEL=(0,0,0,255),
         matte = image_scalefit(matte, width, height, EnumScaleMode.FIT)
         matte = image_convert(imageB, 4)
     else:
-        matte = channel_solid(width, height, color, EnumImageType.BGRA)
+        matte = channel_solid(width, height, color, chan)
     alpha = mask[:,:,0]
     matte[y1:y2, x1:x2, 3] = alpha
     alpha = cv2.bitwise_not(alpha)
@@ -1099,7 +1417,7 @@ def image_matte(image:TYPE_IMAGE, color:TYPE_PIXEL=(0,0,0,255),
     matte[y1:y2, x1:x2] = cv2.convertScaleAbs(image * (1 - alpha) + matte[y1:y2, x1:x2] * alpha)
     if cc == 4:
         matte[y1:y2, x1:x2,3] = mask[:,:,0]
-    return matte
+    return image_rewrap(matte, None if order is None else chan)
 
 def image_merge(imageA: TYPE_IMAGE, imageB: TYPE_IMAGE, axis: int=0, flip: bool=False) -> TYPE_IMAGE:
     if flip:
@@ -1147,34 +1465,33 @@ def image_mirror(image: TYPE_IMAGE, mode:EnumMirrorMode, x:float=0.5, y:float=0.
 
     return image
 
-def image_pixelate(image: TYPE_IMAGE, amount:float=1.)-> TYPE_IMAGE:
+def image_pixelate_batch(images: np.ndarray, amount:float=1.) -> np.ndarray:
+    """Block mean pixelate over a [B,H,W,C] stack in one reshape/mean pass.
 
-    h, w = image.shape[:2]
+    Blocks tile from the top left; rows and columns left over when the size
+    does not divide evenly keep their original pixels.
+    """
+    h, w = images.shape[1:3]
     amount = max(0, min(1, amount))
-    block_size_h = max(1, (h * amount))
-    block_size_w = max(1, (w * amount))
-    num_blocks_h = int(np.ceil(h / block_size_h))
-    num_blocks_w = int(np.ceil(w / block_size_w))
+    num_blocks_h = int(np.ceil(h / max(1, (h * amount))))
+    num_blocks_w = int(np.ceil(w / max(1, (w * amount))))
     block_size_h = h // num_blocks_h
     block_size_w = w // num_blocks_w
-    pixelated_image = image.copy()
-
-    for i in range(num_blocks_h):
-        for j in range(num_blocks_w):
-            # Calculate block boundaries
-            y_start = i * block_size_h
-            y_end = min((i + 1) * block_size_h, h)
-            x_start = j * block_size_w
-            x_end = min((j + 1) * block_size_w, w)
-
-            # Average color values within the block
-            block_average = np.mean(image[y_start:y_end, x_start:x_end], axis=(0, 1))
-
-            # Fill the block with the average color
-            pixelated_image[y_start:y_end, x_start:x_end] = block_average
-
+    y_end = num_blocks_h * block_size_h
+    x_end = num_blocks_w * block_size_w
+
+    # each block on its own pair of axes, averaged in one pass
+    shape = (images.shape[0], num_blocks_h, block_size_h, num_blocks_w, block_size_w, images.shape[3])
+    block_average = images[:, :y_end, :x_end].reshape(shape).mean(axis=(2, 4))
+    pixelated_image = images.copy()
+    pixelated_image[:, :y_end, :x_end] = np.repeat(np.repeat(block_average, block_size_h, axis=1), block_size_w, axis=2)
     return pixelated_image.astype(np.uint8)
 
+def image_pixelate(image: TYPE_IMAGE, amount:float=1.)-> TYPE_IMAGE:
+    if image.ndim == 2:
+        return image_pixelate_batch(image[None, ..., None], amount)[0, ..., 0]
+    return image_pixelate_batch(image[None], amount)[0]
+
 def image_posterize(image: TYPE_IMAGE, levels:int=256) -> TYPE_IMAGE:
     divisor = 256 / max(2, min(256, levels))
     return (np.floor(image / divisor) * int(divisor)).astype(np.uint8)
@@ -1323,54 +1640,96 @@ def image_stack(images: list[TYPE_IMAGE], axis:EnumOrientation=EnumOrientation.H
 
     return image
 
-def image_stereogram(image: TYPE_IMAGE, depth: TYPE_IMAGE, divisions:int=8, mix:float=0.33, gamma:float=0.33, shift:float=1.) -> TYPE_IMAGE:
-    height, width = depth.shape[:2]
-    out = np.zeros((height, width, 3), dtype=np.uint8)
-    image = cv2.resize(image, (width, height))
-    image = image_convert(image, 3)
-    depth = image_convert(depth, 3)
-    noise = np.random.randint(0, max(1, int(gamma * 255)), (height, width, 3), dtype=np.uint8)
-    # noise = cv2.cvtColor(noise, cv2.COLOR_GRAY2BGR)
-    image = cv2.addWeighted(image, 1. - mix, noise, mix, 0)
-
-    pattern_width = width // divisions
-    # shift -= 1
-    for y in range(height):
+@jit(nopython=True, parallel=True, cache=True)
+def _stereogram_solve(image: np.ndarray, depth: np.ndarray, out: np.ndarray, pattern_width: np.ndarray,
+                      divisions: np.ndarray, shift: np.ndarray) -> None:
+    """Autostereogram solver over a [B,H,W] stack; each row only reads back into itself,
+    so every row of every frame runs in parallel."""
+    count, height, width = depth.shape
+    for row in prange(count * height):
+        b = row // height
+        y = row % height
         for x in range(width):
-            if x < pattern_width:
-                out[y, x] = image[y, x]
+            if x < pattern_width[b]:
+                out[b, y, x, :] = image[b, y, x, :]
             else:
-                # out[y, x] = out[y, x - pattern_width + int(shift * invert)]
-                offset = depth[y, x][0] // divisions
-                pos = x - pattern_width + int(shift * offset)
-                # pos = max(-pattern_width, min(pattern_width, pos))
-                out[y, x] = out[y, pos]
-    return out
+                pos = x - pattern_width[b] + int(shift[b] * (depth[b, y, x] // divisions[b]))
+                # negative positions index from the end of the row
+                if pos < 0:
+                    pos += width
+                if 0 <= pos < width:
+                    out[b, y, x, :] = out[b, y, pos, :]
+
+def image_stereogram_batch(images: list[TYPE_IMAGE], depths: list[TYPE_IMAGE], divisions:list[int],
+                           mix:list[float], gamma:list[float], shift:list[float]) -> list[TYPE_IMAGE]:
+    """Batched image_stereogram; same sized frames are solved in one parallel pass.
+    Noise is drawn per frame in order, so a fixed seed matches the single frame results."""
+    sources = []
+    for image, depth, m, g in zip(images, depths, mix, gamma):
+        height, width = depth.shape[:2]
+        image = cv2.resize(image, (width, height))
+        image = image_convert(image, 3)
+        noise = np.random.randint(0, max(1, int(g * 255)), (height, width, 3), dtype=np.uint8)
+        sources.append((cv2.addWeighted(image, 1. - m, noise, m, 0),
+                        np.ascontiguousarray(image_convert(depth, 3)[:,:,0])))
+
+    divisions = np.array(divisions, dtype=np.int64)
+    pattern_width = np.array([d.shape[1] for _, d in sources], dtype=np.int64) // divisions
+    shift = np.array(shift, dtype=np.float64)
+    if len(set(d.shape for _, d in sources)) == 1:
+        image = np.stack([i for i, _ in sources])
+        depth = np.stack([d for _, d in sources])
+        out = np.zeros_like(image)
+        _stereogram_solve(image, depth, out, pattern_width, divisions, shift)
+        return list(out)
+
+    ret = []
+    for idx, (image, depth) in enumerate(sources):
+        out = np.zeros((1,) + image.shape, dtype=np.uint8)
+        _stereogram_solve(image[None], depth[None], out, pattern_width[idx:idx+1],
+                          divisions[idx:idx+1], shift[idx:idx+1])
+        ret.append(out[0])
+    return ret
+
+def image_stereogram(image: TYPE_IMAGE, depth: TYPE_IMAGE, divisions:int=8, mix:float=0.33, gamma:float=0.33, shift:float=1.) -> TYPE_IMAGE:
+    return image_stereogram_batch([image], [depth], [divisions], [mix], [gamma], [shift])[0]
+
+def image_stereo_shift_batch(images: list[TYPE_IMAGE], depths: list[TYPE_IMAGE],
+                             shift:float|list[float]=10) -> list[TYPE_IMAGE]:
+    """Batched image_stereo_shift over same sized frames (e.g. a video depth sequence).
+
+    Pixels scatter right by their depth in one vectorized pass; when several land
+    on the same spot the last one in scan order wins, as in a sequential loop.
+    """
+    images = np.stack([image_convert(i, 4) for i in images])
+    count, height, width = images.shape[:3]
+    depth = np.stack([image_convert(d, 1).reshape(height, width) for d in depths])
+    shift = np.broadcast_to(np.array(shift, dtype=np.float64), (count,))
+    deltas = np.array((depth / 255.0) * shift[:, None, None], dtype=int)
+
+    b, y, x = np.indices(depth.shape).reshape(3, -1)
+    x2 = x + deltas.ravel()
+    valid = (x2 >= 0) & (x2 < width)
+    src = np.flatnonzero(valid)
+    dst = ((b * height + y) * width + x2)[valid]
+    # first hit in the reversed order == last write in scan order
+    dst, last = np.unique(dst[::-1], return_index=True)
+    src = src[::-1][last]
+    shifted = np.zeros((count * height * width, 4), dtype=np.uint8)
+    shifted[dst] = images.reshape(-1, 4)[src]
+    shifted = shifted.reshape(images.shape)
+
+    # transparent wherever the shift left an enclosed hole; the empty slices on
+    # either end and the flat structure keep the frames from touching
+    holes = np.pad(shifted[..., 3] != 255, ((1, 1), (0, 0), (0, 0)))
+    structure = np.zeros((3, 3, 3), dtype=bool)
+    structure[1] = ndimage.generate_binary_structure(2, 1)
+    holes = ndimage.binary_fill_holes(holes, structure)[1:-1]
+    shifted[..., 3] = np.where(holes, 0, 255)
+    return list(shifted)
 
 def image_stereo_shift(image: TYPE_IMAGE, depth: TYPE_IMAGE, shift:float=10) -> TYPE_IMAGE:
-    # Ensure base image has alpha
-    image = image_convert(image, 4)
-    depth = image_convert(depth, 1)
-    deltas = np.array((depth / 255.0) * float(shift), dtype=int)
-    shifted_data = np.zeros_like(image)
-    _, width = image.shape[:2]
-    for y, row in enumerate(deltas):
-        for x, dx in enumerate(row):
-            x2 = x + dx
-            if (x2 >= width) or (x2 < 0):
-                continue
-            shifted_data[y][x2] = image[y][x]
-
-    shifted_image = cv2pil(shifted_data)
-    alphas_image = Image.fromarray(
-        ndimage.binary_fill_holes(
-            ImageChops.invert(
-                shifted_image.getchannel("A")
-            )
-        )
-    ).convert("1")
-    shifted_image.putalpha(ImageChops.invert(alphas_image))
-    return pil2cv(shifted_image)
+    return image_stereo_shift_batch([image], [depth], shift)[0]
 
 def image_threshold(image:TYPE_IMAGE, threshold:float=0.5,
                      mode:EnumThreshold=EnumThreshold.BINARY,
@@ -1403,22 +1762,94 @@ def image_translate(image: TYPE_IMAGE, offset:TYPE_COORD=(0.0, 0.0), edge:EnumEd
 
     return image_affine_edge(image, translate, edge)
 
-def image_transform(image: TYPE_IMAGE, offset:TYPE_COORD=(0.0, 0.0), angle:float=0, scale:TYPE_COORD=(1.0, 1.0), sample:EnumInterpolation=EnumInterpolation.LANCZOS4, edge:EnumEdge=EnumEdge.CLIP) -> TYPE_IMAGE:
+def image_transform_matrix(width:int, height:int, offset:TYPE_COORD=(0.0, 0.0), angle:float=0,
+                           scale:TYPE_COORD=(1.0, 1.0)) -> np.ndarray:
+    """Compose flip/scale, rotate and translate about the image center into one 2x3 matrix.
+
+    Negative scale values flip that axis; the angle is in degrees, clockwise.
+    """
+    cx, cy = (width - 1) * 0.5, (height - 1) * 0.5
     sX, sY = scale
-    if sX < 0:
-        image = cv2.flip(image, 1)
-        sX = -sX
-    if sY < 0:
-        image = cv2.flip(image, 0)
-        sY = -sY
-    if sX != 1. or sY != 1.:
-        image = image_scale(image, (sX, sY), sample, edge)
-    if angle != 0:
-        image = image_rotate(image, angle, edge=edge)
-    if offset[0] != 0. or offset[1] != 0.:
-        image = image_translate(image, offset, edge)
+    S = np.float64([[sX, 0, cx * (1 - sX)], [0, sY, cy * (1 - sY)], [0, 0, 1]])
+    R = np.vstack([cv2.getRotationMatrix2D((cx, cy), -angle, 1.0), [0, 0, 1]])
+    T = np.float64([[1, 0, offset[0] * width], [0, 1, offset[1] * height], [0, 0, 1]])
+    return (T @ R @ S)[:2].astype(np.float32)
+
+def image_warp_affine(image: TYPE_IMAGE, matrix: np.ndarray,
+                      sample:EnumInterpolation=EnumInterpolation.LANCZOS4,
+                      edge:EnumEdge=EnumEdge.CLIP) -> TYPE_IMAGE:
+    """Single resample affine warp that keeps the image size, handling the edge mode in the sampler."""
+    height, width = image.shape[:2]
+    flags = sample.value if sample in AFFINE_INTERPOLATION else cv2.INTER_LINEAR
+    if edge in [EnumEdge.CLIP, EnumEdge.WRAP]:
+        border = cv2.BORDER_WRAP if edge == EnumEdge.WRAP else cv2.BORDER_CONSTANT
+        return cv2.warpAffine(image, matrix, (width, height), flags=flags, borderMode=border, borderValue=0)
+
+    # single axis wrap: sample through the inverse map, wrapping one axis and clipping the other
+    inv = cv2.invertAffineTransform(matrix)
+    x, y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    mapX = inv[0, 0] * x + inv[0, 1] * y + inv[0, 2]
+    mapY = inv[1, 0] * x + inv[1, 1] * y + inv[1, 2]
+    if edge == EnumEdge.WRAPX:
+        outside = (mapY < 0) | (mapY > height - 1)
+    else:
+        outside = (mapX < 0) | (mapX > width - 1)
+    image = cv2.remap(image, mapX, mapY, flags, borderMode=cv2.BORDER_WRAP)
+    image[outside] = 0
     return image
 
+def image_transform(image: TYPE_IMAGE, offset:TYPE_COORD=(0.0, 0.0), angle:float=0, scale:TYPE_COORD=(1.0, 1.0), sample:EnumInterpolation=EnumInterpolation.LANCZOS4, edge:EnumEdge=EnumEdge.CLIP) -> TYPE_IMAGE:
+    """Scale, rotate and translate in a single warp; the output keeps the input size."""
+    if offset[0] == 0 and offset[1] == 0 and angle == 0 and scale[0] == 1 and scale[1] == 1:
+        return image
+    height, width = image.shape[:2]
+    matrix = image_transform_matrix(width, height, offset, angle, scale)
+    return image_warp_affine(image, matrix, sample, edge)
+
+def image_transform_batch(images: torch.Tensor, matrices: list[np.ndarray],
+                          sample:EnumInterpolation=EnumInterpolation.LANCZOS4,
+                          edge:EnumEdge=EnumEdge.CLIP) -> torch.Tensor:
+    """Warp a [B,H,W,C] tensor with one 2x3 matrix per frame in a single grid_sample.
+
+    Matrices are in pixel space, as built by image_transform_matrix. Wrapped
+    axes are tiled before sampling so the filter reads across the seam, as
+    cv2.BORDER_WRAP does. grid_sample has no Lanczos kernel, so LANCZOS4 comes
+    out bicubic; callers that need it exact should warp per frame.
+    """
+    count, height, width = images.shape[:3]
+    inv = np.stack([cv2.invertAffineTransform(m) for m in matrices])
+    inv = torch.from_numpy(inv).to(images.device, torch.float32).reshape(count, 2, 3, 1, 1)
+    y, x = torch.meshgrid(torch.arange(height, device=images.device, dtype=torch.float32),
+                          torch.arange(width, device=images.device, dtype=torch.float32), indexing='ij')
+    mapX = inv[:, 0, 0] * x + inv[:, 0, 1] * y + inv[:, 0, 2]
+    mapY = inv[:, 1, 0] * x + inv[:, 1, 1] * y + inv[:, 1, 2]
+    # the clipped axis of a single axis wrap is cut hard, like image_warp_affine
+    outside = None
+    if edge == EnumEdge.WRAPX:
+        outside = (mapY < 0) | (mapY > height - 1)
+    elif edge == EnumEdge.WRAPY:
+        outside = (mapX < 0) | (mapX > width - 1)
+    # enough wrapped border for the bicubic footprint
+    padX = 2 if edge in [EnumEdge.WRAP, EnumEdge.WRAPX] else 0
+    padY = 2 if edge in [EnumEdge.WRAP, EnumEdge.WRAPY] else 0
+    if padX:
+        mapX = torch.remainder(mapX, width) + padX
+    if padY:
+        mapY = torch.remainder(mapY, height) + padY
+    image = images.permute(0, 3, 1, 2)
+    if padX or padY:
+        image = torch.nn.functional.pad(image, (padX, padX, padY, padY), mode='circular')
+    # pixel -> normalized [-1, 1] grid coordinates (align_corners)
+    grid = torch.stack([mapX * 2 / max(1, width + 2 * padX - 1) - 1,
+                        mapY * 2 / max(1, height + 2 * padY - 1) - 1], dim=-1)
+    mode = 'nearest' if sample in [EnumInterpolation.NEAREST, EnumInterpolation.NEAREST_EXACT] else \
+        'bicubic' if sample in [EnumInterpolation.CUBIC, EnumInterpolation.LANCZOS4] else 'bilinear'
+    image = torch.nn.functional.grid_sample(image, grid, mode=mode, padding_mode='zeros', align_corners=True)
+    image = image.permute(0, 2, 3, 1)
+    if outside is not None:
+        image = image.masked_fill(outside.unsqueeze(-1), 0)
+    return image.clamp(0, 1)
+
 # MORPHOLOGY
 
 def morph_edge_detect(image: TYPE_IMAGE,
@@ -1513,14 +1944,24 @@ def color_image2lut(image: TYPE_IMAGE, num_colors:int=256) -> np.ndarray[np.uint
         lut[i] = color
     return lut
 
-def color_match_histogram(image: TYPE_IMAGE, usermap: TYPE_IMAGE) -> TYPE_IMAGE:
-    """Colorize one input based on the histogram matches."""
+def color_match_histogram_cdf(usermap: TYPE_IMAGE) -> list[tuple[np.ndarray, np.ndarray]]:
+    """The LAB reference CDF color_match_histogram matches against."""
+    return image_histogram_cdf(cv2.cvtColor(image_convert(usermap, 3), cv2.COLOR_BGR2LAB))
+
+def color_match_histogram(image: TYPE_IMAGE, usermap: TYPE_IMAGE,
+                          cdf:Optional[list[tuple[np.ndarray, np.ndarray]]]=None) -> TYPE_IMAGE:
+    """Colorize one input based on the histogram matches.
+
+    Pass color_match_histogram_cdf(usermap) as cdf to skip recounting a
+    reference shared across a batch.
+    """
     if (cc := channel_count(image)[0]) == 4:
         alpha = image_mask(image)[:,:,0]
     image = image_convert(image, 3)
     image = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-    beta = cv2.cvtColor(usermap, cv2.COLOR_BGR2LAB)
-    image = exposure.match_histograms(image, beta, channel_axis=2)
+    if cdf is None:
+        cdf = color_match_histogram_cdf(usermap)
+    image = image_histogram_match(image, None, cdf=cdf)
     image = cv2.cvtColor(image, cv2.COLOR_LAB2BGR)
     image = image_blend(usermap, image, blendOp=BlendType.LUMINOSITY)
     image = image_convert(image, cc)
@@ -165,6 +165,7 @@ class Lexicon(metaclass=LexiconMeta):
     PIXEL_B = '👾B', "Pixel Data (RGBA, RGB or Grayscale)"
     PREFIX = 'PREFIX', "Prefix"
     PRESET = 'PRESET', "Preset"
+    PREVIEW = 'PREVIEW', "Longest edge of the streamed image; 0 streams full size"
     PROJECTION = 'PROJ', "Projection"
     QUALITY = 'QUALITY', "Quality"
     QUALITY_M = 'MOTION', "Motion Quality"
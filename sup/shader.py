@@ -4,8 +4,21 @@ GLSL Support
 """
 
 import os
+import sys
+import json
+import math
 import time
+import ctypes
+import pickle
+import tempfile
+import subprocess
+import threading
+import hashlib
+from pathlib import Path
+from typing import Callable
+from collections import OrderedDict
 
+import torch
 import moderngl
 import numpy as np
 from PIL import Image
@@ -17,14 +30,35 @@ from sympy import false
 MAX_WIDTH = 8192
 MAX_HEIGHT = 8192
 
+# compiled programs kept alive across GLSL instances
+PROGRAM_CACHE_SIZE = int(os.getenv("JOV_GLSL_CACHE", 32))
+# input textures kept for reuse across frames and instances
+TEXTURE_POOL_SIZE = 8
+# samplers declared in FRAGMENT_HEADER
+CHANNEL_COUNT = 3
+# pixel pack buffers in flight during batch renders
+PBO_RING = 3
+
+# edge of the square tile used to render past MAX_WIDTH/MAX_HEIGHT
+TILE_SIZE = int(os.getenv("JOV_GLSL_TILE", 2048))
+# largest tiled output; 32768^2 RGBA is 4GB of host memory
+MAX_TILED = 32768
+
+# egl, software (Mesa llvmpipe through EGL), x11, numpy or auto (first that works)
+GLSL_BACKEND = os.getenv("JOV_GLSL_BACKEND", "auto").lower()
+GLSL_BACKENDS = ["egl", "software", "x11", "numpy"]
+
 VERTEX = """
 #version 330
 in vec2 iPosition;
 out vec2 fragCoord;
 
+// offset and extent of the tile being drawn, in whole image uv
+uniform vec4 iTile = vec4(0.0, 0.0, 1.0, 1.0);
+
 void main() {
     gl_Position = vec4(iPosition, 0.0, 1.0);
-    fragCoord = iPosition / 2.0 + 0.5;
+    fragCoord = iTile.xy + (iPosition / 2.0 + 0.5) * iTile.zw;
 }"""
 
 FRAGMENT_HEADER = """
@@ -51,17 +85,285 @@ uniform sampler2D iChannel2;
 layout(location = 0) out vec4 fragColor;
 """
 
+DEFAULT_FRAGMENT = """void main() {
+    vec4 texColor = texture(iChannel0, fragCoord);
+    vec4 color = vec4(fragCoord, abs(sin(iTime)), 1.0);
+    fragColor = vec4((texColor.xyz + color.xyz) / 2.0, 1.0);
+}"""
+
 MIN_IMAGE_SIZE = 128
 
+# name, width, height
+BENCHMARK_SIZES = [("512", 512, 512), ("1080p", 1920, 1080), ("4k", 3840, 2160)]
+
+TYPE_CHANNEL = Image.Image | np.ndarray | torch.Tensor
+
+# uniforms the GLSL class drives itself; everything else comes from param
+UNIFORM_BUILTIN = ['iResolution', 'iTime', 'iTimeDelta', 'iFrameRate', 'iFrameCount',
+                   'iFrame', 'iTile'] + [f'iChannel{i}' for i in range(CHANNEL_COUNT)]
+
+# =============================================================================
+
+def channel_data(val: np.ndarray|torch.Tensor) -> np.ndarray:
+    """Contiguous uint8 RGBA [H,W,4] pixels for a texture upload."""
+    if isinstance(val, torch.Tensor):
+        # first frame of an IMAGE [B,H,W,C] or MASK [B,H,W] batch
+        if val.ndim == 4 or (val.ndim == 3 and val.shape[-1] not in [1, 3, 4]):
+            val = val[0]
+        val = (val.clamp(0, 1) * 255).to(torch.uint8).cpu().numpy()
+    elif val.dtype != np.uint8:
+        val = (np.clip(val, 0, 1) * 255).astype(np.uint8)
+    if val.ndim == 2:
+        val = val[..., None]
+    cc = val.shape[2]
+    if cc == 4:
+        return np.ascontiguousarray(val)
+    data = np.empty((val.shape[0], val.shape[1], 4), dtype=np.uint8)
+    data[..., :3] = val[..., :3] if cc == 3 else val[..., :1]
+    data[..., 3] = 255
+    return data
+
+def uniform_coerce(value, cast:type, dimension:int, length:int) -> float|int|tuple|list:
+    """Shape and type a param value the way uniform.value wants it."""
+    if isinstance(value, dict):
+        value = [value[str(k)] for k in range(len(value))]
+    flat = np.ravel(np.asarray(value, dtype=np.float64)).tolist()
+    size = dimension * length
+    flat = (flat + [0] * size)[:size] if len(flat) else [0] * size
+    flat = [cast(x) for x in flat]
+    if size == 1:
+        return flat[0]
+    if length == 1:
+        return tuple(flat)
+    if dimension == 1:
+        return flat
+    return [tuple(flat[i:i + dimension]) for i in range(0, size, dimension)]
+
 # =============================================================================
 
 class CompileException(Exception): pass
 
 # =============================================================================
 
+class GLSLProgramCache:
+    """Process wide LRU of compiled programs (and their VAO), keyed by a hash of
+    the full fragment source.
+
+    Evicted programs release their GPU objects right away. GLSL instances look
+    their program up by key every render, so an evicted one just recompiles.
+    """
+    def __init__(self, size:int=PROGRAM_CACHE_SIZE) -> None:
+        self.__size = max(1, size)
+        self.__cache: OrderedDict[str, tuple[moderngl.Program, moderngl.VertexArray]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__cache)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__cache
+
+    @staticmethod
+    def key(fragment: str) -> str:
+        return hashlib.sha1((FRAGMENT_HEADER + fragment).encode('utf8')).hexdigest()
+
+    def get(self, fragment: str, key: str=None) -> tuple[moderngl.Program, moderngl.VertexArray]:
+        """Compiled program and VAO for the fragment, compiling on a miss."""
+        key = key or self.key(fragment)
+        if (entry := self.__cache.get(key)) is not None:
+            self.__cache.move_to_end(key)
+            return entry
+
+        ctx = GLSL.context()
+        try:
+            prog = ctx.program(vertex_shader=VERTEX, fragment_shader=FRAGMENT_HEADER + fragment)
+        except Exception as e:
+            raise CompileException(e)
+        # the param uniforms and the values last sent to them ride along with
+        # the program, so every instance sharing it diffs against the same state
+        prog.extra = {"uniforms": self.__uniform_table(prog), "value": {}}
+        entry = (prog, ctx.simple_vertex_array(prog, GLSL.VBO, "iPosition"))
+        self.__cache[key] = entry
+        while len(self.__cache) > self.__size:
+            self.__release(self.__cache.popitem(last=False)[1])
+        return entry
+
+    @staticmethod
+    def __uniform_table(prog: moderngl.Program) -> dict[str, tuple[moderngl.Uniform, type, int, int]]:
+        """Handle, scalar type, dimension and array length of each param
+        uniform, read off the value the program was linked with."""
+        table = {}
+        for name in prog:
+            uniform = prog[name]
+            if name in UNIFORM_BUILTIN or not isinstance(uniform, moderngl.Uniform):
+                continue
+            first = uniform.value
+            while isinstance(first, (list, tuple)):
+                first = first[0]
+            cast = bool if isinstance(first, bool) else int if isinstance(first, int) else float
+            table[name] = (uniform, cast, uniform.dimension, max(1, uniform.array_length))
+        return table
+
+    def evict(self, key: str) -> None:
+        if (entry := self.__cache.pop(key, None)) is not None:
+            self.__release(entry)
+
+    def clear(self) -> None:
+        while len(self.__cache):
+            self.__release(self.__cache.popitem()[1])
+
+    @staticmethod
+    def __release(entry: tuple[moderngl.Program, moderngl.VertexArray]) -> None:
+        prog, vao = entry
+        vao.release()
+        prog.release()
+
+class GLSLTexturePool:
+    """Input textures shared by every GLSL instance, kept per (slot, size, components).
+
+    Uploads rewrite an existing texture in place with texture.write instead of
+    allocating a new one per frame; the least recently used are released once
+    the pool is full.
+    """
+    def __init__(self, size:int=TEXTURE_POOL_SIZE) -> None:
+        self.__size = max(CHANNEL_COUNT, size)
+        self.__pool: OrderedDict[tuple[int, int, int, int], moderngl.Texture] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__pool)
+
+    def upload(self, slot:int, data:bytes, width:int, height:int, components:int=4) -> moderngl.Texture:
+        """Write the pixels into the pooled texture for this slot and bind it there."""
+        key = (slot, width, height, components)
+        if (texture := self.__pool.get(key)) is None:
+            texture = GLSL.context().texture((width, height), components)
+            self.__pool[key] = texture
+            while len(self.__pool) > self.__size:
+                self.__pool.popitem(last=False)[1].release()
+        else:
+            self.__pool.move_to_end(key)
+        texture.write(data)
+        texture.use(location=slot)
+        return texture
+
+    def clear(self) -> None:
+        while len(self.__pool):
+            self.__pool.popitem()[1].release()
+
 class GLSL:
     CTX = None
     VBO = None
+    # 1x1 black texture bound for inputs a pass does not have
+    BLANK = None
+    BACKEND = None
+    # the thread the context is current in; warmup holds the lock until it lets
+    # go, and backend resolution takes it so a prompt never races context creation
+    THREAD = None
+    LOCK = threading.RLock()
+    PROGRAMS = GLSLProgramCache()
+    TEXTURES = GLSLTexturePool()
+
+    @classmethod
+    def create(cls, fragment:str, width:int=128, height:int=128, param:dict=None) -> "GLSL|GLSLNumpy":
+        """A renderer for the fragment on the active backend."""
+        if cls.backend() == "numpy":
+            return GLSLNumpy(fragment, width, height, param)
+        return cls(fragment, width, height, param)
+
+    @classmethod
+    def backend(cls) -> str:
+        """The active backend, resolving JOV_GLSL_BACKEND on first use."""
+        with cls.LOCK:
+            if cls.BACKEND is None:
+                cls.backend_select(GLSL_BACKEND)
+            return cls.BACKEND
+
+    @classmethod
+    def backend_select(cls, backend:str="auto") -> str:
+        """Switch backends, dropping the current context and everything built on it.
+
+        auto tries each GL backend in turn and falls back to the NumPy
+        evaluator, which only covers the built in res/glsl effects.
+        """
+        with cls.LOCK:
+            cls.PROGRAMS.clear()
+            cls.TEXTURES.clear()
+            if cls.VBO is not None:
+                cls.VBO.release()
+            if cls.BLANK is not None:
+                cls.BLANK.release()
+            cls.BLANK = None
+            if cls.CTX is not None:
+                cls.CTX.release()
+            cls.CTX = cls.VBO = cls.BACKEND = None
+
+            candidates = GLSL_BACKENDS if backend == "auto" else [backend]
+            for name in candidates:
+                if name == "numpy":
+                    cls.BACKEND = name
+                    break
+                try:
+                    cls.CTX = cls.__context_create(name)
+                except Exception as e:
+                    logger.warning(f"GLSL backend {name} unavailable: {e}")
+                    continue
+                cls.BACKEND = name
+                cls.THREAD = threading.get_ident()
+                break
+            if cls.BACKEND is None:
+                raise CompileException(f"no GLSL backend available from {candidates}")
+            logger.info(f"GLSL backend {cls.BACKEND}")
+            return cls.BACKEND
+
+    @staticmethod
+    def __context_create(backend:str) -> moderngl.Context:
+        match backend:
+            case "egl":
+                return moderngl.create_context(standalone=True, backend="egl", libgl='libGL.so.1', libegl='libEGL.so.1')
+            case "software":
+                # Mesa's llvmpipe rasterizer behind a surfaceless EGL display
+                os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
+                os.environ["GALLIUM_DRIVER"] = "llvmpipe"
+                os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+                return moderngl.create_context(standalone=True, backend="egl", libgl='libGL.so.1', libegl='libEGL.so.1')
+            case "x11":
+                return moderngl.create_context(standalone=True)
+        raise ValueError(f"unknown GLSL backend {backend}")
+
+    @classmethod
+    def context(cls) -> moderngl.Context:
+        """The shared context (and full screen quad), created on first use."""
+        with cls.LOCK:
+            if cls.backend() == "numpy":
+                raise CompileException("the numpy GLSL backend has no GL context")
+            if (thread := threading.get_ident()) != cls.THREAD:
+                # contexts are current per thread; adopt one made (and detached) elsewhere
+                cls.CTX.__enter__()
+                cls.THREAD = thread
+            if cls.VBO is None:
+                vertices = np.array([
+                    -1.0, -1.0,
+                    1.0, -1.0,
+                    -1.0,  1.0,
+                    1.0, -1.0,
+                    1.0,  1.0,
+                    -1.0,  1.0
+                ], dtype='f4')
+                cls.VBO = cls.CTX.buffer(vertices.tobytes())
+                cls.BLANK = cls.CTX.texture((1, 1), 4, bytes([0, 0, 0, 255]))
+            return cls.CTX
+
+    @classmethod
+    def detach(cls) -> None:
+        """Release the context from this thread so another one can adopt it."""
+        if cls.CTX is None or cls.THREAD != threading.get_ident():
+            return
+        if cls.BACKEND in ["egl", "software"]:
+            egl = ctypes.CDLL('libEGL.so.1')
+            egl.eglGetCurrentDisplay.restype = ctypes.c_void_p
+            egl.eglMakeCurrent.argtypes = [ctypes.c_void_p] * 4
+            if (display := egl.eglGetCurrentDisplay()):
+                egl.eglMakeCurrent(display, None, None, None)
+        cls.THREAD = None
 
     @classmethod
     def instant(cls, fpath: str, texture1:Image=None, width:int=None, height:int=None, param:dict=None) -> Image:
@@ -73,73 +375,44 @@ class GLSL:
         with open(fpath, 'r', encoding='utf8') as f:
             program = f.read()
 
-        # fire and forget
-        glsl = GLSL(program, width, height, param=param)
-        img = glsl.render(texture1)
-        del glsl
-        return img
-
-    def __init__(self, fragment:str, width:int=128, height:int=128, param:dict=None) -> None:
-        # single initialize for all
-        if GLSL.CTX is None:
-            GLSL.CTX = moderngl.create_context(standalone=True, backend="egl", libgl='libGL.so.1', libegl='libEGL.so.1')
-            vertices = np.array([
-                -1.0, -1.0,
-                1.0, -1.0,
-                -1.0,  1.0,
-                1.0, -1.0,
-                1.0,  1.0,
-                -1.0,  1.0
-            ], dtype='f4')
-            GLSL.VBO = GLSL.CTX.buffer(vertices.tobytes())
+        # fire and forget; the program stays in the cache for the next call
+        glsl = GLSL.create(fpath if GLSL.backend() == "numpy" else program, width, height, param=param)
+        try:
+            return glsl.render(texture1)
+        finally:
+            glsl.release()
 
+    def __init__(self, fragment:str, width:int=128, height:int=128, param:dict=None,
+                 target:bool=True) -> None:
+        """target=False skips the instance's own framebuffer, for passes that
+        only ever draw into one handed to draw()."""
+        GLSL.context()
         if os.path.isfile(fragment):
             with open(fragment, 'r', encoding='utf8') as f:
                 fragment = f.read()
-        self.__fragment: str = FRAGMENT_HEADER + fragment
-        try:
-            self.__prog = GLSL.CTX.program(
-                vertex_shader=VERTEX,
-                fragment_shader=self.__fragment,
-            )
-        except Exception as e:
-            raise CompileException(e)
+        self.__source: str = fragment
+        self.__key: str = GLSLProgramCache.key(fragment)
+        self.__prog = None
+        self.__bind_program()
 
-        self.__iResolution: tuple[int, int] = self.__prog.get('iResolution', None)
-        self.__iTime: float = self.__prog.get('iTime', None)
-        self.__iTimeDelta: float = self.__prog.get('iTimeDelta', None)
-        self.__iFrameRate: float = self.__prog.get('iFrameRate', None)
-        self.__iFrameCount: int = self.__prog.get('iFrameCount', None)
-        self.__iFrame: int = self.__prog.get('iFrame', None)
-
-        try:
-            self.__prog['iChannel0'].value = 0
-        except:
-            pass
-        self.__iChannel0 = self.__prog.get('iChannel0', None)
-
-        for k, v in (param or {}).items():
-            var = self.__prog.get(k, None)
-            if var is None:
+        for k in (param or {}).keys():
+            if k not in self.__uniforms:
                 logger.warning(f"variable missing {k}")
-                continue
-
-            if isinstance(v, dict):
-                v = [v[str(k)] for k in range(len(v))]
-            try:
-                self.__prog[k].value = v
-            except Exception as e:
-                logger.error(e)
-                logger.warning(k)
-                logger.warning(v)
+        self.__uniform_set(param)
 
-        self.__vao = GLSL.CTX.simple_vertex_array(self.__prog, GLSL.VBO, "iPosition")
         self.__width = width
         self.__height = height
-        self.__texture = GLSL.CTX.texture((width, height), 4)
-        self.__fbo = GLSL.CTX.framebuffer(
-            color_attachments=[self.__texture]
-        )
+        self.__target = target
+        self.__texture = self.__fbo = None
+        if target:
+            self.__texture = GLSL.CTX.texture((width, height), 4)
+            self.__fbo = GLSL.CTX.framebuffer(
+                color_attachments=[self.__texture]
+            )
+        self.__readback: np.ndarray = None
+        self.__pbo: list[moderngl.Buffer] = []
+        # tile target and its pixel pack buffers, made on the first tiled render
+        self.__tile: list[moderngl.Texture|moderngl.Framebuffer|moderngl.Buffer] = []
 
         # FPS > 0 will act as a step (per frame step)
         self.__fps: float = 0
@@ -151,6 +424,60 @@ class GLSL:
         self.__delta: float = 0
         self.__frame_count: int = 0
         self.__time_last: float = time.perf_counter()
+        self.total_frames: int = 1
+
+    def __bind_program(self) -> None:
+        """Fetch the (cached) program and refresh the uniform handles if it changed."""
+        prog, self.__vao = GLSL.PROGRAMS.get(self.__source, self.__key)
+        if prog is self.__prog:
+            return
+        self.__prog = prog
+        self.__iResolution: tuple[int, int] = self.__prog.get('iResolution', None)
+        self.__iTime: float = self.__prog.get('iTime', None)
+        self.__iTimeDelta: float = self.__prog.get('iTimeDelta', None)
+        self.__iFrameRate: float = self.__prog.get('iFrameRate', None)
+        self.__iFrameCount: int = self.__prog.get('iFrameCount', None)
+        self.__iFrame: int = self.__prog.get('iFrame', None)
+        self.__iTile: tuple[float, float, float, float] = self.__prog.get('iTile', None)
+
+        # sampler N reads texture unit N
+        self.__iChannel = [self.__prog.get(f'iChannel{i}', None) for i in range(CHANNEL_COUNT)]
+        for i, sampler in enumerate(self.__iChannel):
+            if sampler is not None:
+                sampler.value = i
+        self.__uniforms: dict[str, tuple[moderngl.Uniform, type, int, int]] = prog.extra["uniforms"]
+        self.__uniform_value: dict[str, object] = prog.extra["value"]
+
+    def __uniform_set(self, param:dict=None) -> None:
+        for k, v in (param or {}).items():
+            if (entry := self.__uniforms.get(k, None)) is None:
+                continue
+            uniform, cast, dimension, length = entry
+            try:
+                value = uniform_coerce(v, cast, dimension, length)
+            except (TypeError, ValueError) as e:
+                logger.error(f"{k}: {v} {e}")
+                continue
+            if self.__uniform_value.get(k, None) != value:
+                uniform.value = value
+                self.__uniform_value[k] = value
+
+    @property
+    def uniforms(self) -> dict[str, dict]:
+        """The program's active param uniforms with their type and current value."""
+        return {k: {"type": cast.__name__, "dimension": dimension, "length": length,
+                    "value": self.__uniform_value.get(k, uniform.value)}
+                for k, (uniform, cast, dimension, length) in self.__uniforms.items()}
+
+    def release(self) -> None:
+        """Free the GPU buffers owned by this instance; programs and input
+        textures belong to the shared cache and pool."""
+        for obj in [self.__fbo, self.__texture] + self.__pbo + self.__tile:
+            if obj is not None:
+                obj.release()
+        self.__fbo = self.__texture = None
+        self.__pbo = []
+        self.__tile = []
 
     def reset(self) -> None:
         self.__runtime = 0
@@ -220,7 +547,8 @@ class GLSL:
         val = max(0, min(val, MAX_WIDTH))
         if val != self.__width:
             self.__width = val
-            self.__bufferReset()
+            if self.__target:
+                self.__bufferReset()
 
     @property
     def height(self) -> int:
@@ -231,19 +559,51 @@ class GLSL:
         val = max(0, min(val, MAX_HEIGHT))
         if val != self.__height:
             self.__height = val
-            self.__bufferReset()
+            if self.__target:
+                self.__bufferReset()
+
+    def channel(self, slot:int, val:TYPE_CHANNEL) -> None:
+        """Upload an image into iChannel<slot> through the shared texture pool.
+
+        Takes a PIL image, a uint8/float [H,W,C] array or an IMAGE tensor; a
+        texture already on the GPU (another pass's output) is bound as is.
+        """
+        if self.__iChannel[slot] is None or val is None:
+            return
+        if isinstance(val, moderngl.Texture):
+            val.use(location=slot)
+            return
+        if isinstance(val, Image.Image):
+            if len(val.mode) != 4:
+                val = val.convert("RGBA")
+            GLSL.TEXTURES.upload(slot, val.tobytes(), *val.size)
+            return
+        val = channel_data(val)
+        GLSL.TEXTURES.upload(slot, val, val.shape[1], val.shape[0])
 
     @property
     def channel0(self) -> int:
-        return self.__iChannel0
+        return self.__iChannel[0]
 
     @channel0.setter
-    def channel0(self, val:np.ndarray) -> None:
-        if self.__iChannel0 is not None:
-            if len(val.mode) != 4:
-                val = val.convert("RGBA")
-            self.__channel0_texture = GLSL.CTX.texture(val.size, components=4, data=val.tobytes())
-            self.__channel0_texture.use(location=0)
+    def channel0(self, val:Image) -> None:
+        self.channel(0, val)
+
+    @property
+    def channel1(self) -> int:
+        return self.__iChannel[1]
+
+    @channel1.setter
+    def channel1(self, val:Image) -> None:
+        self.channel(1, val)
+
+    @property
+    def channel2(self) -> int:
+        return self.__iChannel[2]
+
+    @channel2.setter
+    def channel2(self, val:Image) -> None:
+        self.channel(2, val)
 
     def __set_uniforms(self) -> None:
         if self.__iResolution is not None:
@@ -264,35 +624,719 @@ class GLSL:
         if self.__iFrameCount is not None:
             self.__iFrameCount.value = self.total_frames
 
-    def render(self, channel0:Image=None, param:dict=None) -> Image:
-        self.__fbo.use()
-        self.__fbo.clear(0.0, 0.0, 0.0)
+    def render(self, channel0:TYPE_CHANNEL=None, param:dict=None,
+               channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None) -> Image:
+        self.__frame = Image.fromarray(self.render_array(channel0, param, channel1, channel2), "RGBA")
+        return self.__frame
+
+    def __draw(self, channels:list[TYPE_CHANNEL], param:dict=None,
+               fbo:moderngl.Framebuffer=None) -> None:
+        """Set the per frame state and draw the quad into the framebuffer."""
+        self.__bind_program()
+        fbo = fbo or self.__fbo
+        fbo.use()
+        fbo.clear(0.0, 0.0, 0.0)
+        # inputs are always bound, a held frame still has to sample the right
+        # textures; hold only freezes the clock and the uniforms
+        for slot, val in enumerate(channels):
+            self.channel(slot, val)
         if not self.__hold:
             self.__set_uniforms()
-            if channel0 is not None:
-                self.channel0 = channel0
-            for k, v in (param or {}).items():
-                try:
-                    self.__prog[k].value = v
-                except KeyError as _:
-                    pass
-                except Exception as e:
-                    logger.error(k, v)
-                    logger.error(str(e))
-
+            self.__uniform_set(param)
         self.__vao.render()
-        pixels = self.__fbo.color_attachments[0].read()
-        self.__frame = Image.frombytes(
-            "RGBA", self.__fbo.size, pixels,
-            "raw", "RGBA", 0, -1
-        )
-        self.__frame = self.__frame.transpose(Image.FLIP_TOP_BOTTOM)
-
-        # step frame
+
+    def __step(self) -> None:
+        """Advance the clock by one frame."""
         if not self.__hold:
             self.__frame_count += 1
             self.__delta = max(0, self.__fps_rate) if self.__fps > 0 else time.perf_counter() - self.__time_last
             self.__runtime += self.__delta
             self.__time_last = time.perf_counter()
 
+    def draw(self, fbo:moderngl.Framebuffer, channels:list[TYPE_CHANNEL|moderngl.Texture],
+             param:dict=None) -> None:
+        """Draw one frame into someone else's framebuffer and advance the clock."""
+        self.__draw(channels, param, fbo)
+        self.__step()
+
+    def render_array(self, channel0:TYPE_CHANNEL=None, param:dict=None,
+                     channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None,
+                     out:np.ndarray=None) -> np.ndarray:
+        """Render one frame straight into a uint8 RGBA [H,W,4] array.
+
+        The framebuffer is read into out (or a buffer reused between calls, so
+        copy it before the next render) without any PIL round trip.
+        """
+        self.__draw([channel0, channel1, channel2], param)
+        if out is None:
+            if self.__readback is None or self.__readback.shape[:2] != (self.__height, self.__width):
+                self.__readback = np.empty((self.__height, self.__width, 4), dtype=np.uint8)
+            out = self.__readback
+        # rows come back in texture order, which is the order inputs were uploaded in
+        self.__fbo.read_into(out, components=4)
+        self.__step()
+        return out
+
+    def render_batch(self, count:int, channel0:TYPE_CHANNEL|list[TYPE_CHANNEL]=None,
+                     param:dict|list[dict]=None, channel1:TYPE_CHANNEL|list[TYPE_CHANNEL]=None,
+                     channel2:TYPE_CHANNEL|list[TYPE_CHANNEL]=None, ring:int=PBO_RING) -> np.ndarray:
+        """Render count frames into one uint8 RGBA [N,H,W,4] array.
+
+        Channels and params are either shared by every frame or given as a list
+        with one entry per frame. Each frame is read back asynchronously into a
+        ring of pixel pack buffers, so the GPU draws frame N+1 while frame N is
+        still being copied out.
+        """
+        def frame(val, idx):
+            return val[idx] if isinstance(val, list) else val
+
+        def upload(val, idx):
+            # shared inputs stay bound after the first upload
+            return val[idx] if isinstance(val, list) else val if idx == 0 else None
+
+        out = np.empty((count, self.__height, self.__width, 4), dtype=np.uint8)
+        ring = max(1, min(ring, count))
+        size = self.__width * self.__height * 4
+        if len(self.__pbo) != ring or (self.__pbo and self.__pbo[0].size != size):
+            for pbo in self.__pbo:
+                pbo.release()
+            self.__pbo = [GLSL.CTX.buffer(reserve=size) for _ in range(ring)]
+
+        for idx in range(count):
+            self.__draw([upload(channel0, idx), upload(channel1, idx), upload(channel2, idx)], frame(param, idx))
+            self.__fbo.read_into(self.__pbo[idx % ring], components=4)
+            self.__step()
+            # the oldest pending read has had ring - 1 frames of draw time to land
+            if (done := idx - ring + 1) >= 0:
+                self.__pbo[done % ring].read_into(out[done])
+        for done in range(max(0, count - ring + 1), count):
+            self.__pbo[done % ring].read_into(out[done])
+        return out
+
+    def render_tiled(self, width:int, height:int, channel0:TYPE_CHANNEL=None, param:dict=None,
+                     channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None,
+                     tile:int=TILE_SIZE, out:np.ndarray=None) -> np.ndarray:
+        """Render one frame of any size up to MAX_TILED as a grid of tiles.
+
+        iResolution reports the whole image and iTile shifts fragCoord per tile,
+        so shaders see the same coordinates as one giant draw. Only a single
+        tile ever lives on the GPU: each is read back through a pair of pixel
+        pack buffers while the next one draws, then stitched into out.
+        Shaders that use gl_FragCoord directly still see tile local pixels.
+        """
+        width = max(1, min(width, MAX_TILED))
+        height = max(1, min(height, MAX_TILED))
+        tile = max(MIN_IMAGE_SIZE, min(tile, MAX_WIDTH, MAX_HEIGHT))
+        if out is None:
+            out = np.empty((height, width, 4), dtype=np.uint8)
+
+        if len(self.__tile) == 0 or self.__tile[0].size != (tile, tile):
+            for obj in self.__tile:
+                obj.release()
+            texture = GLSL.CTX.texture((tile, tile), 4)
+            self.__tile = [texture, GLSL.CTX.framebuffer(color_attachments=[texture])] + \
+                          [GLSL.CTX.buffer(reserve=tile * tile * 4) for _ in range(2)]
+        _, fbo, *pbo = self.__tile
+        staging = np.empty(tile * tile * 4, dtype=np.uint8)
+
+        grid = [(x, y, min(tile, width - x), min(tile, height - y))
+                for y in range(0, height, tile) for x in range(0, width, tile)]
+
+        def stitch(idx: int) -> None:
+            x, y, tw, th = grid[idx]
+            size = tw * th * 4
+            pbo[idx % 2].read_into(staging[:size], size=size)
+            out[y:y + th, x:x + tw] = staging[:size].reshape(th, tw, 4)
+
+        # iResolution (and the clock) run on the whole image, not the tile
+        size = (self.__width, self.__height)
+        self.__width, self.__height = width, height
+        try:
+            for idx, (x, y, tw, th) in enumerate(grid):
+                if self.__iTile is not None:
+                    self.__iTile.value = (x / width, y / height, tw / width, th / height)
+                fbo.viewport = (0, 0, tw, th)
+                channels = [channel0, channel1, channel2] if idx == 0 else [None] * CHANNEL_COUNT
+                self.__draw(channels, param, fbo)
+                fbo.read_into(pbo[idx % 2], viewport=(0, 0, tw, th), components=4)
+                if idx > 0:
+                    stitch(idx - 1)
+            stitch(len(grid) - 1)
+        finally:
+            self.__width, self.__height = size
+            if self.__iTile is not None:
+                self.__iTile.value = (0.0, 0.0, 1.0, 1.0)
+        self.__step()
+        return out
+
+class GLSLChain:
+    """An ordered list of fragments run as passes without leaving the GPU.
+
+    Pass N reads the output of pass N-1 on iChannel0 (the input image for the
+    first pass), the untouched chain input on iChannel1 and the final output of
+    the previous frame on iChannel2. Passes ping-pong between two framebuffers,
+    so a chain costs one upload and one readback however long it is.
+    """
+    def __init__(self, fragments:list[str], width:int=128, height:int=128) -> None:
+        GLSL.context()
+        if len(fragments) == 0:
+            raise CompileException("empty GLSL chain")
+        self.__passes = [GLSL(f, width, height, target=False) for f in fragments]
+        self.__width = width
+        self.__height = height
+        self.__buffers: list[tuple[moderngl.Texture, moderngl.Framebuffer]] = []
+        self.__bufferReset()
+
+    def __bufferReset(self) -> None:
+        """Two ping-pong targets plus the previous frame."""
+        self.release()
+        for _ in range(3):
+            texture = GLSL.CTX.texture((self.__width, self.__height), 4)
+            self.__buffers.append((texture, GLSL.CTX.framebuffer(color_attachments=[texture])))
+        self.__buffers[2][1].clear(0.0, 0.0, 0.0)
+
+    def release(self) -> None:
+        for texture, fbo in self.__buffers:
+            fbo.release()
+            texture.release()
+        self.__buffers = []
+
+    def reset(self) -> None:
+        for glsl in self.__passes:
+            glsl.reset()
+        if len(self.__buffers):
+            self.__buffers[2][1].clear(0.0, 0.0, 0.0)
+
+    @property
+    def passes(self) -> list[GLSL]:
+        return self.__passes
+
+    @property
+    def runtime(self) -> float:
+        return self.__passes[0].runtime
+
+    @property
+    def fps(self) -> int:
+        return self.__passes[0].fps
+
+    @fps.setter
+    def fps(self, val:int) -> None:
+        for glsl in self.__passes:
+            glsl.fps = val
+
+    @property
+    def hold(self) -> bool:
+        return self.__passes[0].hold
+
+    @hold.setter
+    def hold(self, val: bool) -> None:
+        for glsl in self.__passes:
+            glsl.hold = val
+
+    @property
+    def total_frames(self) -> int:
+        return self.__passes[0].total_frames
+
+    @total_frames.setter
+    def total_frames(self, val: int) -> None:
+        for glsl in self.__passes:
+            glsl.total_frames = val
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @width.setter
+    def width(self, val: int) -> None:
+        val = max(0, min(val, MAX_WIDTH))
+        if val != self.__width:
+            self.__width = val
+            for glsl in self.__passes:
+                glsl.width = val
+            self.__bufferReset()
+
+    @property
+    def height(self) -> int:
+        return self.__height
+
+    @height.setter
+    def height(self, val: int) -> None:
+        val = max(0, min(val, MAX_HEIGHT))
+        if val != self.__height:
+            self.__height = val
+            for glsl in self.__passes:
+                glsl.height = val
+            self.__bufferReset()
+
+    def __upload(self, val:TYPE_CHANNEL) -> moderngl.Texture:
+        if val is None:
+            return None
+        if isinstance(val, Image.Image):
+            val = np.asarray(val.convert("RGBA"))
+        val = channel_data(val)
+        return GLSL.TEXTURES.upload(0, val, val.shape[1], val.shape[0])
+
+    def __draw(self, source:moderngl.Texture, param:dict|list[dict]=None) -> moderngl.Framebuffer:
+        """Run every pass, returning the framebuffer holding the last one."""
+        # never leave a unit holding a ping-pong target a pass may be drawing into
+        if source is None:
+            source = GLSL.BLANK
+        history, last = self.__buffers[2][0], source
+        for idx, glsl in enumerate(self.__passes):
+            texture, fbo = self.__buffers[idx % 2]
+            glsl.draw(fbo, [last, source, history], param[idx] if isinstance(param, list) else param)
+            last = texture
+        return fbo
+
+    def render_array(self, channel0:TYPE_CHANNEL=None, param:dict|list[dict]=None,
+                     out:np.ndarray=None) -> np.ndarray:
+        """Render one frame of the whole chain into a uint8 RGBA [H,W,4] array.
+
+        param is shared by every pass (uniforms a pass lacks are skipped) or
+        given as a list with one dict per pass.
+        """
+        fbo = self.__draw(self.__upload(channel0), param)
+        if out is None:
+            out = np.empty((self.__height, self.__width, 4), dtype=np.uint8)
+        fbo.read_into(out, components=4)
+        GLSL.CTX.copy_framebuffer(self.__buffers[2][1], fbo)
+        return out
+
+    def render_batch(self, count:int, channel0:TYPE_CHANNEL|list[TYPE_CHANNEL]=None,
+                     param:dict|list[dict]=None) -> np.ndarray:
+        """Render count frames into one uint8 RGBA [N,H,W,4] array; a shared
+        input is uploaded once for the whole batch."""
+        out = np.empty((count, self.__height, self.__width, 4), dtype=np.uint8)
+        source = None if isinstance(channel0, list) else self.__upload(channel0)
+        for idx in range(count):
+            if isinstance(channel0, list):
+                source = self.__upload(channel0[idx])
+            fbo = self.__draw(source, param)
+            fbo.read_into(out[idx], components=4)
+            GLSL.CTX.copy_framebuffer(self.__buffers[2][1], fbo)
+        return out
+
+# =============================================================================
+# === NUMPY BACKEND ===
+# =============================================================================
+
+def _np_sample(channel: np.ndarray, st: np.ndarray) -> np.ndarray:
+    """Nearest texel lookup with GL_REPEAT wrapping; st is [H,W,2] uv."""
+    if channel is None:
+        return np.zeros(st.shape[:2] + (4,), dtype=np.float32)
+    h, w = channel.shape[:2]
+    x = np.floor(st[..., 0] * w).astype(np.int64) % w
+    y = np.floor(st[..., 1] * h).astype(np.int64) % h
+    return channel[y, x]
+
+def _np_vec(param: dict, name: str, default: tuple) -> np.ndarray:
+    val = param.get(name, default)
+    if isinstance(val, dict):
+        val = [val[str(k)] for k in range(len(val))]
+    return np.asarray(val, dtype=np.float32)
+
+def _np_grayscale(st, ch, param) -> np.ndarray:
+    color = _np_sample(ch[0], st)
+    gray = color[..., :3] @ _np_vec(param, 'conversion', (0.299, 0.587, 0.114))
+    return np.dstack([gray, gray, gray, np.ones_like(gray)])
+
+def _np_flt_range(st, ch, param) -> np.ndarray:
+    color = _np_sample(ch[0], st)
+    start = _np_vec(param, 'start', (0, 0, 0))
+    end = _np_vec(param, 'end', (1, 1, 1))
+    rgb = color[..., :3]
+    inside = np.all((rgb >= start) & (rgb <= end), axis=-1).astype(np.float32)
+    return np.dstack([inside, inside, inside, color[..., 3]])
+
+def _np_sepia(st, ch, param) -> np.ndarray:
+    color = _np_sample(ch[0], st)
+    rgb = color[..., :3]
+    target = rgb * _np_vec(param, 'target_tone', (1.2, 1.0, 0.8))
+    opacity = float(param.get('opacity', 0.75))
+    return np.dstack([rgb + (target - rgb) * opacity, np.ones(st.shape[:2], dtype=np.float32)])
+
+def _np_tiler(st, ch, param) -> np.ndarray:
+    st = np.mod(st * _np_vec(param, 'uTile', (1, 1)), 1.)
+    return _np_sample(ch[0], st)
+
+def _np_rotate(st, ch, param) -> np.ndarray:
+    rads = math.radians(float(param.get('angle', 0)))
+    s, c = math.sin(rads), math.cos(rads)
+    center = _np_vec(param, 'center', (0.5, 0.5))
+    st = st - center
+    st = np.stack([st[..., 0] * c - st[..., 1] * s, st[..., 0] * s + st[..., 1] * c], axis=-1) + center
+    return _np_sample(ch[0], st)
+
+def _np_mirror(st, ch, param) -> np.ndarray:
+    center = _np_vec(param, 'center', (0.5, 0.5))
+    flip = np.mod(st * 0.5, 1.) > center
+    st = np.where(flip, 1. - st, st)
+    st = np.mod(st, 1.) * float(param.get('uZoom', 1))
+    return _np_sample(ch[0], st)
+
+def _np_checker(st, ch, param) -> np.ndarray:
+    st = np.mod(st * _np_vec(param, 'uTile', (1, 1)), 1.)
+    result = np.mod((st >= 0.5).sum(axis=-1), 2).astype(np.float32)
+    color = 1. - result
+    return np.dstack([color, color, color, np.ones_like(color)])
+
+def _np_bulge(st, ch, param) -> np.ndarray:
+    center = _np_vec(param, 'center', (0.5, 0.5))
+    radius = float(param.get('radius', 2))
+    strength = float(param.get('strength', 1))
+    uv = st - center
+    dist = np.linalg.norm(uv, axis=-1, keepdims=True) * radius / 8.
+    uv = uv * (strength / (1. + dist ** 2)) + center
+    color = _np_sample(ch[0], uv)
+    color[..., 3] = 1.
+    return color
+
+# NumPy ports of the built in shaders, keyed by file stem
+GLSL_NUMPY: dict[str, Callable] = {
+    "clr-grayscale": _np_grayscale,
+    "clr-flt-range": _np_flt_range,
+    "vfx-sepia": _np_sepia,
+    "trs-tiler": _np_tiler,
+    "trs-rotate": _np_rotate,
+    "trs-mirror": _np_mirror,
+    "cre-pat-checker": _np_checker,
+    "vfx-bulge": _np_bulge,
+}
+
+class GLSLNumpy:
+    """CPU stand in for GLSL when no GL context can be made.
+
+    Only shaders with a NumPy port in GLSL_NUMPY can run; anything else
+    raises CompileException just as a failed compile would.
+    """
+    def __init__(self, fragment:str, width:int=128, height:int=128, param:dict=None) -> None:
+        stem = Path(fragment).stem if os.path.isfile(fragment) else None
+        if (func := GLSL_NUMPY.get(stem, None)) is None:
+            raise CompileException(f"no numpy port for shader {stem or 'from source'}")
+        self.__func = func
+        self.__param: dict = dict(param or {})
+        self.__width = width
+        self.__height = height
+        self.__channels: list[np.ndarray] = [None] * CHANNEL_COUNT
+        self.__fps: float = 0
+        self.__fps_rate: float = 0
+        self.__frame: Image = Image.new("RGB", (1, 1))
+        self.__hold: bool = False
+        self.__runtime: float = 0
+        self.__frame_count: int = 0
+        self.__time_last: float = time.perf_counter()
+        self.total_frames: int = 1
+
+    def release(self) -> None:
+        self.__channels = [None] * CHANNEL_COUNT
+
+    @property
+    def uniforms(self) -> dict[str, dict]:
+        return {k: {"value": v} for k, v in self.__param.items()}
+
+    def reset(self) -> None:
+        self.__runtime = 0
+        self.__frame_count = 0
+        self.__time_last = time.perf_counter()
+
+    @property
+    def frame(self) -> Image:
+        return self.__frame
+
+    @property
+    def fps(self) -> int:
+        return self.__fps
+
+    @fps.setter
+    def fps(self, val:int) -> None:
+        self.__fps = max(0, min(1000, val))
+        if self.__fps > 0:
+            self.__fps_rate = 1 / self.__fps
+
+    @property
+    def runtime(self) -> float:
+        return self.__runtime
+
+    @runtime.setter
+    def runtime(self, val:float) -> None:
+        self.__runtime = max(0, val)
+
+    @property
+    def hold(self) -> bool:
+        return self.__hold
+
+    @hold.setter
+    def hold(self, val: bool) -> None:
+        self.__hold = val
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @width.setter
+    def width(self, val: int) -> None:
+        self.__width = max(0, min(val, MAX_WIDTH))
+
+    @property
+    def height(self) -> int:
+        return self.__height
+
+    @height.setter
+    def height(self, val: int) -> None:
+        self.__height = max(0, min(val, MAX_HEIGHT))
+
+    def channel(self, slot:int, val:TYPE_CHANNEL) -> None:
+        if val is None:
+            return
+        if isinstance(val, Image.Image):
+            val = np.asarray(val.convert("RGBA"))
+        self.__channels[slot] = channel_data(val).astype(np.float32) / 255.
+
+    def render(self, channel0:TYPE_CHANNEL=None, param:dict=None,
+               channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None) -> Image:
+        self.__frame = Image.fromarray(self.render_array(channel0, param, channel1, channel2), "RGBA")
         return self.__frame
+
+    def render_array(self, channel0:TYPE_CHANNEL=None, param:dict=None,
+                     channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None,
+                     out:np.ndarray=None) -> np.ndarray:
+        for slot, val in enumerate([channel0, channel1, channel2]):
+            self.channel(slot, val)
+        if not self.__hold:
+            self.__param.update(param or {})
+        # sample at pixel centres, row 0 at the bottom of uv space like the framebuffer
+        u = (np.arange(self.__width, dtype=np.float32) + 0.5) / max(1, self.__width)
+        v = (np.arange(self.__height, dtype=np.float32) + 0.5) / max(1, self.__height)
+        st = np.stack(np.meshgrid(u, v), axis=-1)
+        color = self.__func(st, self.__channels, self.__param)
+        if out is None:
+            out = np.empty((self.__height, self.__width, 4), dtype=np.uint8)
+        np.clip(color * 255. + 0.5, 0, 255, out=color)
+        out[:] = color
+        if not self.__hold:
+            self.__frame_count += 1
+            delta = self.__fps_rate if self.__fps > 0 else time.perf_counter() - self.__time_last
+            self.__runtime += delta
+            self.__time_last = time.perf_counter()
+        return out
+
+    def render_batch(self, count:int, channel0:TYPE_CHANNEL|list[TYPE_CHANNEL]=None,
+                     param:dict|list[dict]=None, channel1:TYPE_CHANNEL|list[TYPE_CHANNEL]=None,
+                     channel2:TYPE_CHANNEL|list[TYPE_CHANNEL]=None, ring:int=PBO_RING) -> np.ndarray:
+        def frame(val, idx):
+            return val[idx] if isinstance(val, list) else val
+
+        out = np.empty((count, self.__height, self.__width, 4), dtype=np.uint8)
+        for idx in range(count):
+            self.render_array(frame(channel0, idx), frame(param, idx),
+                              frame(channel1, idx), frame(channel2, idx), out=out[idx])
+        return out
+
+    def render_tiled(self, width:int, height:int, channel0:TYPE_CHANNEL=None, param:dict=None,
+                     channel1:TYPE_CHANNEL=None, channel2:TYPE_CHANNEL=None,
+                     tile:int=TILE_SIZE, out:np.ndarray=None) -> np.ndarray:
+        # no GPU memory to run out of; evaluate the whole image in one go
+        size = (self.__width, self.__height)
+        self.__width = max(1, min(width, MAX_TILED))
+        self.__height = max(1, min(height, MAX_TILED))
+        try:
+            return self.render_array(channel0, param, channel1, channel2, out=out)
+        finally:
+            self.__width, self.__height = size
+
+def _backend_fps(job:dict) -> float:
+    """Time one backend_benchmark job in this process."""
+    GLSL.backend_select(job["backend"])
+    glsl = GLSL.create(job["fragment"], job["width"], job["height"], job["param"])
+    # first frame pays for uploads and driver warm up
+    glsl.render_array(job["channel0"], job["param"])
+    start = time.perf_counter()
+    glsl.render_batch(job["frames"], job["channel0"], job["param"])
+    fps = job["frames"] / max(1e-9, time.perf_counter() - start)
+    glsl.release()
+    return fps
+
+def backend_benchmark(fragment:str, width:int=512, height:int=512, frames:int=60,
+                      backends:list[str]=None, channel0:TYPE_CHANNEL=None,
+                      param:dict=None) -> dict[str, float]:
+    """Frames per second of one shader on each backend; unavailable backends
+    report 0.
+
+    Each backend runs in its own child process. Switching backends here would
+    release the context, program cache and texture pool under live node
+    instances, and the software backend rewrites the Mesa environment, so
+    neither the GLSL state nor os.environ of the caller is touched. Even so,
+    the children compete for the same GPU; do not run it while a graph is live.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in backends or GLSL_BACKENDS:
+            fps = 0
+            job = os.path.join(tmp, f"{name}.pkl")
+            with open(job, 'wb') as f:
+                pickle.dump({"backend": name, "fragment": fragment, "width": width,
+                             "height": height, "frames": frames,
+                             "channel0": channel_data(channel0) if channel0 is not None else None,
+                             "param": param}, f)
+            try:
+                ret = subprocess.run([sys.executable, __file__, "--job", job],
+                                     capture_output=True, text=True, timeout=600)
+                if ret.returncode != 0:
+                    raise RuntimeError(ret.stderr.strip().splitlines()[-1] if ret.stderr.strip() else ret.returncode)
+                fps = float(ret.stdout.strip().splitlines()[-1])
+            except Exception as e:
+                logger.warning(f"benchmark {name}: {e}")
+            results[name] = fps
+            logger.info(f"{name} {width}x{height} {fps:.2f} fps")
+    return results
+
+def shader_warmup(root:Path) -> dict[str, float]:
+    """Create the context and compile every shader under root ahead of the
+    first prompt, returning (and logging) the milliseconds each one took.
+
+    The context is detached afterwards so the thread that renders can adopt it.
+    """
+    timings = {}
+    start = time.perf_counter()
+    with GLSL.LOCK:
+        if GLSL.CTX is not None and GLSL.THREAD not in [None, threading.get_ident()]:
+            # a prompt got there first and owns the context now; nothing to warm
+            logger.info("GLSL warmup skipped, context already in use")
+            return timings
+        try:
+            if GLSL.backend() == "numpy":
+                logger.info("GLSL warmup skipped, numpy backend")
+                return timings
+            GLSL.context()
+            timings["context"] = (time.perf_counter() - start) * 1000
+            logger.info(f"GLSL warmup context {timings['context']:.1f}ms")
+            for fpath in sorted(Path(root).rglob("*.glsl")):
+                stamp = time.perf_counter()
+                try:
+                    with open(fpath, 'r', encoding='utf8') as f:
+                        GLSL.PROGRAMS.get(f.read())
+                except CompileException as e:
+                    logger.warning(f"GLSL warmup {fpath.name} failed: {e}")
+                    continue
+                timings[fpath.stem] = (time.perf_counter() - stamp) * 1000
+                logger.info(f"GLSL warmup {fpath.stem} {timings[fpath.stem]:.1f}ms")
+        except Exception as e:
+            logger.error(f"GLSL warmup failed: {e}")
+        finally:
+            GLSL.detach()
+    logger.info(f"GLSL warmup {len(timings)} in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return timings
+
+def _benchmark_stats(samples: list[float]) -> dict[str, float]:
+    """Milliseconds summary of per frame timings given in seconds."""
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    return {"mean": float(ms.mean()), "min": float(ms.min()), "max": float(ms.max()),
+            "p50": float(np.median(ms)), "p95": float(np.percentile(ms, 95))}
+
+def shader_benchmark(fragments:dict[str, str], sizes:list[tuple[str, int, int]]=None,
+                     frames:int=30) -> dict:
+    """Time every fragment at every size, keeping the costs apart.
+
+    compile is a cold compile (the program is evicted first); render is the
+    draw with a glFinish so the GPU work lands inside it; readback is the
+    framebuffer copy into numpy; convert is uint8 RGBA to a float tensor, the
+    way the nodes hand frames to ComfyUI. On the numpy backend render covers
+    the whole CPU evaluation and the other stages are zero.
+    """
+    backend = GLSL.backend()
+    report = {"backend": backend, "frames": frames, "results": []}
+    if backend != "numpy":
+        report["renderer"] = GLSL.context().info.get("GL_RENDERER", "")
+    rng = np.random.default_rng(0)
+    for name, fragment in fragments.items():
+        for label, width, height in sizes or BENCHMARK_SIZES:
+            entry = {"shader": name, "size": label, "width": width, "height": height}
+            report["results"].append(entry)
+            source = fragment
+            if os.path.isfile(fragment):
+                with open(fragment, 'r', encoding='utf8') as f:
+                    source = f.read()
+            channel0 = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+            out = np.empty((height, width, 4), dtype=np.uint8)
+            render, readback, convert = [], [], []
+            try:
+                if backend == "numpy":
+                    glsl = GLSL.create(fragment, width, height)
+                    entry["compile_ms"] = 0.
+                    for _ in range(frames):
+                        start = time.perf_counter()
+                        glsl.render_array(channel0, out=out)
+                        render.append(time.perf_counter() - start)
+                    readback = convert = [0.]
+                else:
+                    key = GLSLProgramCache.key(source)
+                    GLSL.PROGRAMS.evict(key)
+                    start = time.perf_counter()
+                    GLSL.PROGRAMS.get(source, key)
+                    entry["compile_ms"] = (time.perf_counter() - start) * 1000
+                    ctx = GLSL.context()
+                    glsl = GLSL(source, width, height, target=False)
+                    texture = ctx.texture((width, height), 4)
+                    fbo = ctx.framebuffer(color_attachments=[texture])
+                    try:
+                        # first frame pays for the input upload and driver state
+                        glsl.draw(fbo, [channel0])
+                        ctx.finish()
+                        for _ in range(frames):
+                            start = time.perf_counter()
+                            glsl.draw(fbo, [None])
+                            ctx.finish()
+                            render.append(time.perf_counter() - start)
+                            start = time.perf_counter()
+                            fbo.read_into(out, components=4)
+                            readback.append(time.perf_counter() - start)
+                            start = time.perf_counter()
+                            torch.from_numpy(out).to(torch.float32).div_(255)
+                            convert.append(time.perf_counter() - start)
+                    finally:
+                        fbo.release()
+                        texture.release()
+                glsl.release()
+            except CompileException as e:
+                entry["error"] = str(e)
+                logger.warning(f"benchmark {name} {label}: {e}")
+                continue
+            entry["render_ms"] = _benchmark_stats(render)
+            entry["readback_ms"] = _benchmark_stats(readback)
+            entry["convert_ms"] = _benchmark_stats(convert)
+            total = entry["render_ms"]["mean"] + entry["readback_ms"]["mean"] + entry["convert_ms"]["mean"]
+            entry["fps"] = 1000 / max(1e-6, total)
+            logger.info(f"{name} {label} {entry['fps']:.1f} fps")
+    return report
+
+# =============================================================================
+# === TESTING ===
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="benchmark the res/glsl shaders")
+    parser.add_argument("--backend", default=GLSL_BACKEND, choices=["auto"] + GLSL_BACKENDS,
+                        help="software runs headless on Mesa llvmpipe")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--root", default=str(Path(__file__).parent.parent / "res" / "glsl"))
+    parser.add_argument("--out", default=None, help="JSON report path, stdout if missing")
+    parser.add_argument("--job", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.job is not None:
+        # one backend_benchmark backend, run apart from the caller
+        with open(args.job, 'rb') as f:
+            print(_backend_fps(pickle.load(f)))
+        sys.exit(0)
+
+    GLSL.backend_select(args.backend)
+    fragments = {"default": DEFAULT_FRAGMENT}
+    fragments.update({f.stem: str(f) for f in sorted(Path(args.root).rglob("*.glsl"))})
+    report = json.dumps(shader_benchmark(fragments, frames=args.frames), indent=2)
+    if args.out is None:
+        print(report)
+    else:
+        with open(args.out, 'w', encoding='utf8') as f:
+            f.write(report)
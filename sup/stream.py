@@ -5,19 +5,22 @@ Media Stream Support
 
 import os
 import sys
-import json
 import time
 import array
+import asyncio
 import threading
-from typing import Any
+from enum import Enum
+from typing import Any, Callable
 from itertools import repeat
+from collections import deque
 from configparser import ConfigParser
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import mss
 import mss.tools
 import numpy as np
+from aiohttp import web
 from PIL import Image, ImageGrab
 
 from loguru import logger
@@ -35,6 +38,15 @@ if JOV_SPOUT:
 else:
     logger.warning("SKIPPING SPOUT GL SUPPORT")
 
+# libjpeg-turbo through PyTurboJPEG, when present, for JPEG routes
+try:
+    from turbojpeg import TurboJPEG
+    JOV_TURBOJPEG = TurboJPEG()
+    logger.info("TURBOJPEG SUPPORT")
+except Exception:
+    JOV_TURBOJPEG = None
+    logger.info("NO TURBOJPEG SUPPORT, JPEG ROUTES USE OPENCV")
+
 from Jovimetrix import Singleton
 from Jovimetrix.sup.image import image_load, pil2cv, TYPE_PIXEL, MIN_IMAGE_SIZE
 
@@ -55,6 +67,20 @@ try:
     JOV_STREAM_PORT = int(os.getenv("JOV_STREAM_PORT", JOV_STREAM_PORT))
 except Exception as e:
     logger.error(str(e))
+# publish timestamps kept per endpoint to measure its fps
+STREAM_FPS_WINDOW = 60
+# captures kept per stream for its fps and latency metrics
+STREAM_METRIC_WINDOW = 240
+# frames of history each capture stream keeps; grows to the largest batch asked for
+JOV_STREAM_HISTORY = int(os.getenv("JOV_STREAM_HISTORY", 8))
+# encodes run here, so routes (and big frames) spread over cores
+JOV_STREAM_WORKERS = int(os.getenv("JOV_STREAM_WORKERS", min(8, os.cpu_count() or 1)))
+STREAM_ENCODE_POOL = ThreadPoolExecutor(max_workers=max(1, JOV_STREAM_WORKERS), thread_name_prefix="jov_encode")
+
+class EnumStreamCodec(Enum):
+    JPEG = 0
+    WEBP = 10
+    PNG = 20
 
 # =============================================================================
 # === SCREEN / WINDOW CAPTURE ===
@@ -186,25 +212,52 @@ def camera_list() -> list:
     return camera_list
 
 class MediaStreamBase:
+    """Capture thread for a source, keeping the newest frames in a ring.
+
+    The ring is one preallocated [N,H,W,C] block plus a timestamp per slot,
+    filled in place as frames arrive, so batch reads get distinct consecutive
+    frames without polling the source.
+    """
 
     TIMEOUT = 5.
 
-    def __init__(self, fps:float=30) -> None:
+    def __init__(self, fps:float=30, history:int=JOV_STREAM_HISTORY, freerun:bool=False) -> None:
+        self.__freerun = freerun
+        self.__metric_frame: deque[float] = deque(maxlen=STREAM_METRIC_WINDOW)
+        self.__metric_latency: deque[float] = deque(maxlen=STREAM_METRIC_WINDOW)
+        self.__metric_drop = 0
+        self.__metric_stale = 0
+        self.__ring_cond = threading.Condition()
+        self.__ring_size = max(1, history)
+        self.__ring: np.ndarray = None
+        self.__ring_time: np.ndarray = None
+        # frames pushed since the ring was last (re)allocated
+        self.__ring_count = 0
+        # the ring is only allocated and filled once a reader asks for history
+        self.__ring_on = False
+        self.__metric_count = 0
         self.__quit = False
         self.__paused = False
         self.__captured = False
         self.__fps = fps
         self.__timeout = None
         self.__frame = None
+        # called with every new frame, from the capture thread
+        self.__subscribers: list[Callable[[Any], None]] = []
         self.__thread = threading.Thread(target=self.__run, daemon=True)
         self.__thread.start()
 
     def __run(self) -> None:
+        # deadlines are absolute, so a slow callback eats into its own slot
+        # instead of pushing every later frame back
+        deadline = time.perf_counter()
+        period = 0
         while not self.__quit:
+            if (target := 1. / self.__fps) != period:
+                period = target
+                deadline = time.perf_counter()
 
-            delta = 1. / self.__fps
-            waste = time.perf_counter() + delta
-
+            fresh = False
             if not self.__paused:
                 if not self.__captured:
                     pause = self.__paused
@@ -216,27 +269,173 @@ class MediaStreamBase:
 
                     self.__paused = pause
                     self.__captured = True
+                    deadline = time.perf_counter()
                     logger.info(f"CAPTURED")
 
                 if self.__timeout is None and self.TIMEOUT > 0:
                     self.__timeout = time.perf_counter() + self.TIMEOUT
 
                 # call the run capture frame command on subclasses
-                newframe = self.callback()
+                stamp = time.perf_counter()
+                newframe = self.__callback_timed()
                 if newframe is not None:
+                    if newframe is not self.__frame:
+                        fresh = True
+                        self.__metric_frame.append(stamp)
+                        self.__ring_push(newframe, stamp)
+                        for subscriber in list(self.__subscribers):
+                            subscriber(newframe)
+                    else:
+                        self.__metric_stale += 1
                     self.__frame = newframe
                     self.__timeout = None
+                else:
+                    self.__metric_stale += 1
 
             if self.__timeout is not None and time.perf_counter() > self.__timeout:
                 self.__timeout = None
                 self.__quit = True
                 logger.warning(f"TIMEOUT")
 
-            waste = max(waste - time.perf_counter(), 0)
-            time.sleep(waste)
+            if self.__freerun and not self.__paused:
+                # the source's own blocking read sets the pace; sources that
+                # return straight away get a breather when nothing was new
+                if not fresh:
+                    time.sleep(0.001)
+                deadline = time.perf_counter()
+                continue
+
+            deadline += period
+            if (missed := int((time.perf_counter() - deadline) // period)) > 0:
+                # whole slots already gone are dropped, not made up in a burst;
+                # a partial overrun just starts the next read straight away
+                self.__metric_drop += missed
+                deadline += missed * period
+            time.sleep(max(0, deadline - time.perf_counter()))
 
         logger.info(f"STOPPED")
         self.end()
+        with self.__ring_cond:
+            self.__ring_cond.notify_all()
+
+    def __callback_timed(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return self.callback()
+        finally:
+            self.__metric_latency.append(time.perf_counter() - start)
+
+    @property
+    def metrics(self) -> dict:
+        """Achieved fps, callback latency percentiles (ms), dropped slots and
+        reads that produced no new frame."""
+        stamps = list(self.__metric_frame)
+        fps = 0
+        if len(stamps) > 1 and stamps[-1] > stamps[0]:
+            fps = (len(stamps) - 1) / (stamps[-1] - stamps[0])
+        latency = {}
+        if len(self.__metric_latency):
+            ms = np.asarray(self.__metric_latency, dtype=np.float64) * 1000
+            latency = {f"p{p}": round(float(np.percentile(ms, p)), 3) for p in [50, 95, 99]}
+        return {"fps_target": 0 if self.__freerun else self.__fps, "fps": round(fps, 2),
+                "latency_ms": latency, "drops": self.__metric_drop,
+                "stale": self.__metric_stale, "frames": self.__metric_count}
+
+    def __ring_push(self, frame: np.ndarray, stamp: float) -> None:
+        if not isinstance(frame, np.ndarray):
+            return
+        self.__metric_count += 1
+        if not self.__ring_on:
+            return
+        with self.__ring_cond:
+            if self.__ring is None or self.__ring.shape[1:] != frame.shape or self.__ring.dtype != frame.dtype:
+                # older entries would not stack with this one; start over
+                self.__ring = np.empty((self.__ring_size,) + frame.shape, dtype=frame.dtype)
+                self.__ring_time = np.zeros(self.__ring_size, dtype=np.float64)
+                self.__ring_count = 0
+            idx = self.__ring_count % self.__ring_size
+            np.copyto(self.__ring[idx], frame)
+            self.__ring_time[idx] = stamp
+            self.__ring_count += 1
+            self.__ring_cond.notify_all()
+
+    @property
+    def history(self) -> int:
+        return self.__ring_size
+
+    @history.setter
+    def history(self, val: int) -> None:
+        val = max(1, val)
+        with self.__ring_cond:
+            self.__ring_on = True
+            if val == self.__ring_size:
+                return
+            if self.__ring is not None:
+                # carry the newest frames over so a resize never empties the ring
+                keep = min(self.__ring_count, self.__ring_size, val)
+                slots = [i % self.__ring_size for i in range(self.__ring_count - keep, self.__ring_count)]
+                ring = np.empty((val,) + self.__ring.shape[1:], dtype=self.__ring.dtype)
+                ring_time = np.zeros(val, dtype=np.float64)
+                ring[:keep] = self.__ring[slots]
+                ring_time[:keep] = self.__ring_time[slots]
+                self.__ring, self.__ring_time = ring, ring_time
+                self.__ring_count = keep
+            self.__ring_size = val
+
+    @property
+    def oldest(self) -> float|None:
+        """Timestamp of the oldest frame still in the ring."""
+        with self.__ring_cond:
+            if self.__ring is None or self.__ring_count == 0:
+                return None
+            return float(self.__ring_time[max(0, self.__ring_count - self.__ring_size) % self.__ring_size])
+
+    def frames(self, count: int, timeout: float=None) -> list[tuple[float, np.ndarray]]:
+        """The newest count distinct frames as (timestamp, frame), oldest first.
+
+        Blocks only while the ring holds fewer than count frames (a fresh
+        stream, or one just grown to fit count), for up to count frames of
+        source time plus TIMEOUT by default.
+        """
+        count = max(1, count)
+        self.history = max(count, self.__ring_size)
+        if timeout is None:
+            timeout = count / max(1, self.__fps) + self.TIMEOUT
+        with self.__ring_cond:
+            self.__ring_cond.wait_for(lambda: self.__ring_count >= count or self.__quit, timeout)
+            if self.__ring is None:
+                return []
+            total = self.__ring_count
+            avail = min(count, total, self.__ring_size)
+            return [(float(self.__ring_time[i % self.__ring_size]), self.__ring[i % self.__ring_size].copy())
+                    for i in range(total - avail, total)]
+
+    def frames_at(self, stamps: list[float], timeout: float=None) -> list[tuple[float, np.ndarray]]:
+        """The buffered frame nearest each target timestamp (perf_counter
+        clock), waiting until the newest target has been reached.
+
+        Targets closer together than the source's frame interval resolve to the
+        same frame, so it repeats in the result, as a held frame would.
+        """
+        if len(stamps) == 0:
+            return []
+        latest = max(stamps)
+        self.__ring_on = True
+        if timeout is None:
+            timeout = max(0, latest - time.perf_counter()) + self.TIMEOUT
+        with self.__ring_cond:
+            self.__ring_cond.wait_for(lambda: self.__quit or (self.__ring is not None and self.__ring_count > 0 and
+                self.__ring_time[(self.__ring_count - 1) % self.__ring_size] >= latest), timeout)
+            if self.__ring is None or self.__ring_count == 0:
+                return []
+            valid = min(self.__ring_count, self.__ring_size)
+            slots = [i % self.__ring_size for i in range(self.__ring_count - valid, self.__ring_count)]
+            times = self.__ring_time[slots]
+            result = []
+            for stamp in stamps:
+                slot = slots[int(np.argmin(np.abs(times - stamp)))]
+                result.append((float(self.__ring_time[slot]), self.__ring[slot].copy()))
+            return result
 
     def __del__(self) -> None:
         self.end()
@@ -261,6 +460,14 @@ class MediaStreamBase:
     def play(self) -> None:
         self.__paused = False
 
+    def subscribe(self, subscriber: Callable[[Any], None]) -> None:
+        if subscriber not in self.__subscribers:
+            self.__subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[Any], None]) -> None:
+        if subscriber in self.__subscribers:
+            self.__subscribers.remove(subscriber)
+
     def pause(self) -> None:
         self.__paused = True
 
@@ -280,6 +487,15 @@ class MediaStreamBase:
     def fps(self, val: float) -> None:
         self.__fps = max(1, val)
 
+    @property
+    def freerun(self) -> bool:
+        """Read as fast as the source delivers instead of pacing to fps."""
+        return self.__freerun
+
+    @freerun.setter
+    def freerun(self, val: bool) -> None:
+        self.__freerun = val
+
 class MediaStreamStatic(MediaStreamBase):
     """A stream coming from ComfyUI."""
     def __init__(self) -> None:
@@ -460,6 +676,10 @@ class StreamManager(metaclass=Singleton):
     def active(self) -> list[MediaStreamDevice]:
         return [stream for stream in StreamManager.STREAM.values() if stream.captured]
 
+    @property
+    def metrics(self) -> dict[str, dict]:
+        return {str(url): stream.metrics for url, stream in StreamManager.STREAM.items()}
+
     def frame(self, url: str) -> Any:
         if (stream := StreamManager.STREAM.get(url, None)) is None:
             # attempt to capture first time...
@@ -500,78 +720,248 @@ class StreamManager(metaclass=Singleton):
 # === SERVER ===
 # =============================================================================
 
-class StreamingHandler(BaseHTTPRequestHandler):
-    def __init__(self, outputs, *arg, **kw) -> None:
-        self.__outputs = outputs
-        super().__init__(*arg, **kw)
-
-    def do_GET(self) -> None:
-        key = self.path.lower()
-
-        # Check if the key exists in your data dictionary
-        if key in self.__outputs:
-            data = self.__outputs[key]
-
-            self.send_response(200)
-            self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
-            self.end_headers()
-
-            while True:
-                try:
-                    if (frame := data['b']) is not None:
-                        _, jpeg = cv2.imencode('.jpg', frame)
-                        self.wfile.write(b'--frame\r\n')
-                        self.send_header('Content-Type', 'image/jpeg')
-                        self.send_header('Content-Length', len(jpeg))
-                        self.end_headers()
-                        self.wfile.write(jpeg.tobytes())
-                        self.wfile.write(b'\r\n')
-                except Exception as e:
-                    logger.error(str(e))
-                    break
-                time.sleep(0.001)
-
-        elif key == 'jovimetrix':
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            data = json.dumps(data)
-            self.wfile.write(data.encode('utf-8'))
-        else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b'Not Found')
+class StreamEncoder:
+    """How a route turns frames into bytes: codec, quality, preview size and
+    an fps cap (0 leaves the rate to the source)."""
+    MIME = {
+        EnumStreamCodec.JPEG: 'image/jpeg',
+        EnumStreamCodec.WEBP: 'image/webp',
+        EnumStreamCodec.PNG: 'image/png'
+    }
+
+    def __init__(self, codec:EnumStreamCodec=EnumStreamCodec.JPEG, quality:int=80,
+                 preview:int=0, fps:float=0) -> None:
+        self.codec = codec
+        self.quality = max(1, min(100, quality))
+        self.preview = max(0, preview)
+        self.fps = max(0, fps)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, StreamEncoder) and \
+            (self.codec, self.quality, self.preview, self.fps) == (other.codec, other.quality, other.preview, other.fps)
+
+    @property
+    def mime(self) -> str:
+        return self.MIME[self.codec]
+
+    def encode(self, frame: TYPE_PIXEL) -> bytes:
+        if self.preview > 0 and (edge := max(frame.shape[:2])) > self.preview:
+            scale = self.preview / edge
+            size = (max(1, int(frame.shape[1] * scale)), max(1, int(frame.shape[0] * scale)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        match self.codec:
+            case EnumStreamCodec.WEBP:
+                _, data = cv2.imencode('.webp', frame, [cv2.IMWRITE_WEBP_QUALITY, self.quality])
+            case EnumStreamCodec.PNG:
+                # quality maps onto compression effort, 100 being the fastest
+                level = int(round((100 - self.quality) * 9 / 99))
+                _, data = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, level])
+            case _:
+                if frame.ndim == 3 and frame.shape[2] == 4:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+                # turbojpeg defaults to BGR pixels; single channel frames stay on OpenCV
+                if JOV_TURBOJPEG is not None and frame.ndim == 3 and frame.shape[2] == 3:
+                    return JOV_TURBOJPEG.encode(np.ascontiguousarray(frame), quality=self.quality)
+                _, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return data.tobytes()
+
+class StreamEndpoint:
+    """One published route: the latest frame and its JPEG, encoded at most once.
+
+    The stream pushes frames in with publish. Clients wait until a newer
+    sequence number than the one they last sent exists; the first one to wake
+    encodes and everyone else reuses the bytes. Clients that fall behind
+    simply skip to the newest frame.
+    """
+    def __init__(self, name: str, stream: MediaStreamBase, encoder: StreamEncoder=None) -> None:
+        self.__name = name
+        self.__stream = stream
+        self.__encoder = encoder or StreamEncoder()
+        self.__lock = threading.Lock()
+        self.__encoding = threading.Lock()
+        self.__frame = None
+        self.__seq = 0
+        self.__jpeg: bytes = None
+        self.__jpeg_seq = 0
+        # the content type the cached bytes were encoded as
+        self.__mime: str = None
+        # asyncio clients park on an event owned by the server loop
+        self.__loop: asyncio.AbstractEventLoop = None
+        self.__event: asyncio.Event = None
+        self.__published: deque[float] = deque(maxlen=STREAM_FPS_WINDOW)
+        # earliest time the next frame may go out when the encoder caps fps
+        self.__due = 0.
+        self.clients = 0
+        self.bytes_sent = 0
+        if (frame := stream.frame) is not None:
+            self.publish(frame)
+        stream.subscribe(self.publish)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.__name})"
+
+    @property
+    def stream(self) -> MediaStreamBase:
+        return self.__stream
+
+    @property
+    def seq(self) -> int:
+        return self.__seq
+
+    @property
+    def encoder(self) -> StreamEncoder:
+        return self.__encoder
+
+    @encoder.setter
+    def encoder(self, encoder: StreamEncoder) -> None:
+        if encoder == self.__encoder:
+            return
+        with self.__encoding:
+            self.__encoder = encoder
+            # the cached bytes were made with the old settings
+            self.__jpeg_seq = 0
+
+    @property
+    def fps(self) -> float:
+        """Frames published per second over the recent window."""
+        stamps = list(self.__published)
+        if len(stamps) < 2 or stamps[-1] == stamps[0]:
+            return 0
+        return (len(stamps) - 1) / (stamps[-1] - stamps[0])
+
+    @property
+    def status(self) -> dict:
+        return {"fps": round(self.fps, 2), "clients": self.clients,
+                "bytes": self.bytes_sent, "frames": self.__seq,
+                "source": self.__stream.metrics}
+
+    def close(self) -> None:
+        self.__stream.unsubscribe(self.publish)
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__wake)
+
+    def publish(self, frame: TYPE_PIXEL) -> None:
+        now = time.perf_counter()
+        with self.__lock:
+            if frame is self.__frame:
+                return
+            if (fps := self.__encoder.fps) > 0:
+                # capped routes skip whatever arrives before the next slot, so
+                # every client shares one encode at the capped rate
+                if now < self.__due:
+                    return
+                interval = 1. / fps
+                self.__due = max(self.__due, now - interval) + interval
+            self.__frame = frame
+            self.__seq += 1
+            self.__published.append(now)
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__wake)
+
+    def encode(self) -> tuple[int, bytes, str]:
+        """The newest frame's sequence, bytes and their mime type; only the
+        first caller per frame pays."""
+        with self.__encoding:
+            with self.__lock:
+                seq, frame = self.__seq, self.__frame
+            if self.__jpeg_seq != seq and frame is not None:
+                self.__jpeg = self.__encoder.encode(frame)
+                self.__mime = self.__encoder.mime
+                self.__jpeg_seq = seq
+            return self.__jpeg_seq, self.__jpeg, self.__mime
+
+    def __wake(self) -> None:
+        # runs on the server loop; waiters grab the current event, so swap in a fresh one
+        if self.__event is not None:
+            self.__event.set()
+            self.__event = None
+
+    async def next(self, seq: int, timeout: float=1.) -> tuple[int, bytes|None, str|None]:
+        """Wait on the server loop for a frame newer than seq; None on timeout.
+
+        Encoding runs on the shared encode pool so the loop keeps serving.
+        """
+        loop = asyncio.get_running_loop()
+        self.__loop = loop
+        if self.__seq <= seq:
+            if self.__event is None:
+                self.__event = asyncio.Event()
+            try:
+                await asyncio.wait_for(self.__event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return seq, None, None
+            if self.__seq <= seq:
+                return seq, None, None
+        return await loop.run_in_executor(STREAM_ENCODE_POOL, self.encode)
 
 class StreamingServer(metaclass=Singleton):
-    OUT = {}
+    """MJPEG routes served from one asyncio loop on its own thread.
+
+    Every client is a coroutine rather than a thread. Each write waits for the
+    socket to drain, and whatever was published meanwhile is skipped, so a slow
+    client drops frames instead of queuing them. /jovimetrix reports per route
+    fps, client count and bytes sent.
+    """
+    OUT: dict[str, StreamEndpoint] = {}
 
     @classmethod
-    def endpointAdd(cls, name: str, stream: MediaStreamDevice) -> None:
-        StreamingServer.OUT[name] = {'_': stream, 'b': None}
+    def endpointAdd(cls, name: str, stream: MediaStreamDevice, encoder: StreamEncoder=None) -> StreamEndpoint:
+        if (old := StreamingServer.OUT.get(name, None)) is not None:
+            old.close()
+        StreamingServer.OUT[name] = endpoint = StreamEndpoint(name, stream, encoder)
         logger.info(f"ENDPOINT_ADD ({name})")
+        return endpoint
 
     def __init__(self, host: str='', port: int=JOV_STREAM_PORT) -> None:
         self.__host = host
         self.__port = port
-        self.__address = (self.__host, self.__port)
         self.__thread_server = threading.Thread(target=self.__server, daemon=True)
         self.__thread_server.start()
-        self.__thread_capture = threading.Thread(target=self.__capture, daemon=True)
-        self.__thread_capture.start()
         logger.info("STARTED")
 
     def __server(self) -> None:
-        httpd = ThreadingHTTPServer(self.__address, lambda *args: StreamingHandler(StreamingServer.OUT, *args))
-        while True:
-            httpd.handle_request()
-
-    def __capture(self) -> None:
-        while True:
-            current = StreamingServer.OUT.copy()
-            for k, v in current.items():
-                if (device := v['_']) is not None:
-                    StreamingServer.OUT[k]['b'] = device.frame
-            time.sleep(0.001)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get('/jovimetrix', self.__status)
+        app.router.add_get('/{route:.*}', self.__stream)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, self.__host or None, self.__port)
+        loop.run_until_complete(site.start())
+        loop.run_forever()
+
+    async def __status(self, request: web.Request) -> web.Response:
+        status = {k: v.status for k, v in StreamingServer.OUT.items()}
+        status["streams"] = StreamManager().metrics
+        return web.json_response(status)
+
+    async def __stream(self, request: web.Request) -> web.StreamResponse:
+        if (endpoint := StreamingServer.OUT.get(request.path.lower(), None)) is None:
+            raise web.HTTPNotFound()
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+            'Cache-Control': 'no-cache'
+        })
+        await response.prepare(request)
+        endpoint.clients += 1
+        seq = 0
+        try:
+            while StreamingServer.OUT.get(request.path.lower(), None) is endpoint:
+                seq, jpeg, mime = await endpoint.next(seq)
+                if jpeg is None:
+                    continue
+                header = f"--frame\r\nContent-Type: {mime}\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+                await response.write(header.encode('ascii') + jpeg + b'\r\n')
+                endpoint.bytes_sent += len(jpeg)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            logger.error(str(e))
+        finally:
+            endpoint.clients -= 1
+        return response
 
 # =============================================================================
 # === SPOUT SERVER ===
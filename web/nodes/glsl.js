@@ -160,8 +160,23 @@ app.registerExtension({
                     app.canvas.setDirty(true);
                 }
             }
+            async function python_glsl_uniforms(event) {
+                if (event.detail.id != self.id) {
+                    return;
+                }
+                // the uniforms the compiled program kept; the driver drops any
+                // the fragment never reads, so their widgets do nothing
+                self.glsl_uniforms = event.detail.uniforms;
+                const unused = self.widgets.slice(8)
+                    .filter(w => !(w.name in self.glsl_uniforms))
+                    .map(w => w.name);
+                if (unused.length) {
+                    console.info("GLSL uniforms unused by the shader:", unused.join(", "));
+                }
+            }
             api.addEventListener("jovi-glsl-error", python_glsl_error);
             api.addEventListener("jovi-glsl-time", python_glsl_time);
+            api.addEventListener("jovi-glsl-uniforms", python_glsl_uniforms);
             setTimeout(() => {
                 init_fragment(widget_fragment.value);
             }, 10);